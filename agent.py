@@ -0,0 +1,226 @@
+#
+# An autopilot that learns to play by itself with tabular Q-learning
+# The state is a few numbers about the bird and the next pipe, rounded into buckets, so the whole policy is a small
+# table. Training plays headless worlds as fast as World.step goes
+#
+# Train with: python agent.py --episodes 20000 --save agent.json
+# Play with: python flappy_bird.py --autopilot agent.json
+# With physics: python agent.py --physics --save agent.json, then python flappy_bird.py --physics --autopilot agent.json
+#
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from logic import World
+
+# The two actions
+COAST = 0
+FLAP = 1
+
+
+class QAgent:
+    """
+    Learns how good it is to flap or not in every state
+
+    An instance is a policy: calling it with a World returns True to flap, so it can be given to Game, to
+    parallel.evaluate or to any headless loop. The best action of every state is memoized and only worked
+    out again when the values of that state change
+    """
+
+    def __init__(self, alpha=0.2, gamma=0.99, epsilon=0.01, dy_bucket=2, dx_bucket=6, seed=None):
+        """
+        :param alpha: How far every update moves a value towards its target
+        :param gamma: How much future reward is worth compared to reward now
+        :param epsilon: How often training tries a random action
+        :param dy_bucket: How many rows are rounded into one bucket of the height above or below the gap
+        :param dx_bucket: How many columns are rounded into one bucket of the distance to the pipe
+        :param seed: The seed for the random actions taken while training
+        """
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.dy_bucket = dy_bucket
+        self.dx_bucket = dx_bucket
+        self.random = random.Random(seed)
+        # state -> [value of coasting, value of flapping]
+        self.table = {}
+        # state -> the best action, memoized
+        self.actions = {}
+        # The settings of the Physics the agent was trained with, or None for the integer movement. The states mean
+        # something different with physics, so a table only flies the movement it learned
+        self.physics = None
+
+    def state(self, world):
+        """
+        Turns a world into a state
+        :param world: An instance of World
+        :return: (rows from the middle of the bird to the middle of the gap, columns to the pipe, velocity), all
+        rounded into buckets
+        """
+        bird = world.bird
+        pipe = world.pipes.first_right_of(bird.x)
+        if pipe is None:
+            dy, dx = world.height // 2 - (bird.y + bird.height / 2), world.width
+        else:
+            dy, dx = (pipe.top + pipe.bottom) / 2 - (bird.y + bird.height / 2), pipe.x - bird.x
+        if world.physics is None:
+            # 0 just flapped, 1 coasting, 2 falling
+            velocity = min(world.tick_value, 2)
+        else:
+            velocity = int(bird.vy // 5)
+        return int(dy // self.dy_bucket), int(dx // self.dx_bucket), velocity
+
+    def action(self, state):
+        """
+        The best action in a state
+        :param state: A state made by self.state
+        :return: COAST or FLAP
+        """
+        action = self.actions.get(state)
+        if action is None:
+            values = self.table.get(state)
+            # A state never seen before coasts, since flapping too much is the usual way to die early on
+            action = FLAP if values is not None and values[FLAP] > values[COAST] else COAST
+            self.actions[state] = action
+        return action
+
+    def __call__(self, world):
+        return self.action(self.state(world)) == FLAP
+
+    def update(self, state, action, reward, next_state):
+        """
+        Moves the value of an action towards the reward plus the value of the best action after it
+        :param state: The state the action was taken in
+        :param action: COAST or FLAP
+        :param reward: The reward the action got
+        :param next_state: The state after the action, or None if the game ended
+        :return: None
+        """
+        values = self.table.get(state)
+        if values is None:
+            values = self.table[state] = [0.0, 0.0]
+        target = reward
+        if next_state is not None:
+            next_values = self.table.get(next_state)
+            if next_values is not None:
+                target += self.gamma * max(next_values)
+        values[action] += self.alpha * (target - values[action])
+        # The best action of this state may have changed
+        self.actions.pop(state, None)
+
+    def episode(self, world, ticks=10000, explore=True):
+        """
+        Plays one game and learns from it
+        :param world: An instance of World, already started
+        :param ticks: The most ticks to play
+        :param explore: Whether to sometimes take a random action
+        :return: The score
+        """
+        state = self.state(world)
+        score_engine = world.ScoreEngine
+        rand = self.random.random
+        epsilon = self.epsilon if explore else 0
+        for _ in range(ticks):
+            action = (FLAP if rand() < 0.5 else COAST) if rand() < epsilon else self.action(state)
+            score = score_engine.score()
+            if world.step(action == FLAP) is not None:
+                self.update(state, action, -100.0, None)
+                break
+            next_state = self.state(world)
+            self.update(state, action, 1.0 + 10.0 * (score_engine.score() - score), next_state)
+            state = next_state
+        return score_engine.score()
+
+    def train(self, episodes, height=50, width=120, ticks=10000, seed=0, physics=None, report=None):
+        """
+        Plays many headless games, learning from every one
+        :param episodes: How many games to play
+        :param height: The height of every world
+        :param width: The width of every world
+        :param ticks: The most ticks in one game
+        :param seed: The seed of the first game. Every game uses the next seed
+        :param physics: An instance of Physics for the worlds, or None. It has to be the same for every call
+        :param report: Print progress every this many games. None prints nothing
+        :return: A list of the scores
+        """
+        settings = None if physics is None else physics.settings()
+        assert not self.table or settings == self.physics, "The agent was trained with different physics"
+        self.physics = settings
+        scores = []
+        for index in range(episodes):
+            world = World(height, width, seed=seed + index, physics=physics).start()
+            scores.append(self.episode(world, ticks))
+            if report is not None and (index + 1) % report == 0:
+                recent = scores[-report:]
+                print('{} games, last {}: mean score {:.1f}, best {}, {} states'.format(
+                    index + 1, report, sum(recent) / len(recent), max(recent), len(self.table)), flush=True)
+        return scores
+
+    def settings(self):
+        return dict(alpha=self.alpha, gamma=self.gamma, epsilon=self.epsilon, dy_bucket=self.dy_bucket,
+                    dx_bucket=self.dx_bucket)
+
+    def save(self, path):
+        """
+        Writes the agent to a JSON file
+        :param path: Where to write the file
+        :return: None
+        """
+        table = {','.join(str(part) for part in state): values for state, values in self.table.items()}
+        with open(path, 'w') as file:
+            json.dump({'settings': self.settings(), 'physics': self.physics, 'table': table}, file,
+                      separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads an agent written by save
+        :param path: The file
+        :return: An instance of QAgent
+        """
+        with open(path) as file:
+            data = json.load(file)
+        agent = cls(**data['settings'])
+        # Agents saved before physics were recorded were all trained with the integer movement
+        agent.physics = data.get('physics')
+        agent.table = {tuple(int(part) for part in state.split(',')): values
+                       for state, values in data['table'].items()}
+        return agent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Trains an autopilot for Glappy Gird')
+    parser.add_argument('--episodes', type=int, default=20000, help='How many games to train on')
+    parser.add_argument('--ticks', type=int, default=10000, help='The most ticks in one game')
+    parser.add_argument('--size', default='50x120', help='The size of the worlds, as HEIGHTxWIDTH')
+    parser.add_argument('--seed', type=int, default=0, help='The seed of the first game')
+    parser.add_argument('--physics', action='store_true',
+                        help='Train with sub-cell physics, to fly flappy_bird.py --physics')
+    parser.add_argument('--tick', type=float, default=0.2,
+                        help='The tick length of the physics. flappy_bird.py uses 0.2')
+    parser.add_argument('--load', help='Keep training an agent saved earlier')
+    parser.add_argument('--save', default='agent.json', help='Where to save the agent')
+    parser.add_argument('--report', type=int, default=1000, help='Print progress every this many games')
+    args = parser.parse_args(argv)
+    height, width = (int(part) for part in args.size.split('x'))
+
+    agent = QAgent.load(args.load) if args.load else QAgent(seed=args.seed)
+    start = time.perf_counter()
+    physics = None
+    if args.physics:
+        from physics import Physics
+        physics = Physics(dt=args.tick)
+    if agent.table and agent.physics != (None if physics is None else physics.settings()):
+        parser.error('{} was trained with different physics'.format(args.load))
+    agent.train(args.episodes, height, width, args.ticks, args.seed, physics=physics, report=args.report)
+    seconds = time.perf_counter() - start
+    print('Trained on {} games in {:.1f}s ({:.0f} games/s)'.format(args.episodes, seconds, args.episodes / seconds))
+    agent.save(args.save)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#
+# An asyncio game loop
+# Reading input, stepping the world and drawing are three tasks joined by queues, so a slow draw never holds up a step
+#
+
+import asyncio
+import concurrent.futures
+import time
+
+from scheduler import drain
+
+
+class AsyncRuntime:
+    """
+    Runs a game as three asyncio tasks
+
+    The input task reads keys every poll_interval seconds and puts them on a queue. The simulation task steps the
+    world at a fixed timestep, handing each step every key read since the last one, and then puts a snapshot of the
+    world on the frame queue. The frame queue only holds one snapshot: if the renderer has not taken the last one yet
+    it is thrown away, so the screen always shows the newest frame and the simulation never waits for the terminal.
+
+    curses is not thread safe, so reading keys and drawing both run on one worker thread. Steps run on the event loop
+    """
+
+    def __init__(self, step, snapshot, render, poll, tick_length, poll_interval=0.005, fps=None, max_steps=5,
+                 clock=time.perf_counter):
+        """
+        :param step: Called with a list of keys once per tick. Returning False stops the loop
+        :param snapshot: Called after the steps of a tick to copy what needs to be drawn. Must not share anything
+        that later steps change, since it is drawn on another thread
+        :param render: Called with a snapshot to draw it. Runs on the worker thread
+        :param poll: Called to read one key. Should return -1 when there are no keys left, like stdscr.getch. Runs on
+        the worker thread
+        :param tick_length: How many seconds one step of the world takes
+        :param poll_interval: How many seconds between reads of the keyboard
+        :param fps: The most frames to draw every second. None draws every snapshot it can
+        :param max_steps: The most steps run at once when the simulation falls behind
+        :param clock: Returns the current time in seconds
+        """
+        assert tick_length > 0, "The length of a tick must be greater than 0"
+        assert poll_interval > 0, "The poll interval must be greater than 0"
+        assert fps is None or fps > 0, "The FPS must be greater than 0, or None for no cap"
+        self.step = step
+        self.snapshot = snapshot
+        self.render = render
+        self.poll = poll
+        self.tick_length = tick_length
+        self.poll_interval = poll_interval
+        self.frame_length = None if fps is None else 1 / fps
+        self.max_steps = max_steps
+        self.clock = clock
+
+        # Made by run, since they belong to its event loop
+        self.inputs = None
+        self.frames = None
+        self.executor = None
+        self.running = False
+        # A SystemExit raised by a step, raised again by main once every task has stopped
+        self.exit = None
+
+        # Measurements, in seconds
+        self.tick_time = 0
+        self.render_time = 0
+        # The longest a key waited between being read and being given to a step
+        self.input_latency = 0
+        self.ticks = 0
+        self.frames_drawn = 0
+        # Snapshots thrown away because a newer one was ready before they were drawn
+        self.dropped = 0
+
+    def drain(self):
+        """
+        Reads every key that is waiting
+        :return: A list of keys
+        """
+        return drain(self.poll)
+
+    def stop(self):
+        """
+        Stops every task after what it is doing now
+        :return: None
+        """
+        self.running = False
+
+    def publish(self, snapshot):
+        """
+        Puts a snapshot on the frame queue, throwing away the one already there
+        :param snapshot: Whatever the snapshot function returned
+        :return: None
+        """
+        if self.frames.full():
+            self.frames.get_nowait()
+            self.dropped += 1
+        self.frames.put_nowait(snapshot)
+
+    async def read_input(self):
+        loop = asyncio.get_running_loop()
+        clock = self.clock
+        while self.running:
+            keys = await loop.run_in_executor(self.executor, self.drain)
+            now = clock()
+            for key in keys:
+                self.inputs.put_nowait((key, now))
+            await asyncio.sleep(self.poll_interval)
+
+    async def simulate(self):
+        clock = self.clock
+        inputs = self.inputs
+        next_tick = clock() + self.tick_length
+        while self.running:
+            delay = next_tick - clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            steps = 0
+            while clock() >= next_tick:
+                if steps == self.max_steps:
+                    # Too far behind to catch up. Drop the time instead of running more and more steps
+                    next_tick = clock() + self.tick_length
+                    break
+                start = clock()
+                keys = []
+                while not inputs.empty():
+                    key, read = inputs.get_nowait()
+                    keys.append(key)
+                    self.input_latency = max(self.input_latency, start - read)
+                try:
+                    playing = self.step(keys)
+                except SystemExit as exit:
+                    # asyncio does not stop cleanly when a task raises SystemExit, so it is held on to until the
+                    # other tasks have stopped
+                    self.exit = exit
+                    playing = False
+                if playing is False:
+                    self.running = False
+                    return
+                self.tick_time = clock() - start
+                self.ticks += 1
+                next_tick += self.tick_length
+                steps += 1
+
+            if steps:
+                self.publish(self.snapshot())
+
+    async def render_frames(self):
+        loop = asyncio.get_running_loop()
+        clock = self.clock
+        while self.running:
+            snapshot = await self.frames.get()
+            start = clock()
+            await loop.run_in_executor(self.executor, self.render, snapshot)
+            self.render_time = clock() - start
+            self.frames_drawn += 1
+
+            if self.frame_length is not None:
+                remaining = self.frame_length - (clock() - start)
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+
+    async def main(self):
+        """
+        Runs the three tasks until one of them ends, then stops the others
+        :return: None
+        """
+        self.inputs = asyncio.Queue()
+        self.frames = asyncio.Queue(maxsize=1)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='curses')
+        self.running = True
+        tasks = [asyncio.ensure_future(self.read_input()), asyncio.ensure_future(self.simulate()),
+                 asyncio.ensure_future(self.render_frames())]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            self.running = False
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            # Raises whatever stopped a task
+            for task in done:
+                task.result()
+        finally:
+            self.running = False
+            # Waits for a draw that was already running on the worker thread
+            self.executor.shutdown(wait=True)
+
+    def run(self):
+        """
+        Runs until a step returns False or stop is called
+        :return: None
+        """
+        self.exit = None
+        asyncio.run(self.main())
+        if self.exit is not None:
+            raise self.exit
@@ -0,0 +1,187 @@
+#
+# Many birds flying through the same pipes at once
+# Every bird is a row in a few NumPy arrays, so one tick is a handful of array operations no matter how many birds
+# there are. Needs NumPy
+#
+
+import random
+
+import numpy as np
+
+from generator import PipeGenerator, PipeSpec
+
+# Why a bird died, stored in BatchWorld.cause
+ALIVE = 0
+TOP = 1
+BOTTOM = 2
+PIPE = 3
+
+CAUSES = {ALIVE: None, TOP: 'top', BOTTOM: 'bottom', PIPE: 'pipe'}
+
+
+class BatchWorld:
+    """
+    Steps many birds against one shared set of pipes
+
+    Follows the same rules as World: pipes move backwards pipe_speed every tick, a flap moves a bird up flap_amount,
+    a bird that does not flap coasts for one tick and then falls fall_amount every tick, pipes planned by a
+    PipeGenerator are added as they scroll into view and a bird scores once for every pipe it gets past. All the birds
+    share the same x so only the pipes at that x are checked for collisions. The difficulty follows the best score
+    """
+
+    def __init__(self, count, height, width, bird_height=3, bird_width=5, bird_y=10, bird_x=10, pipe_speed=3,
+                 flap_amount=3, fall_amount=2, pipe_width=10, seed=None, curve=None, lookahead=16, physics=None):
+        assert count > 0, "There needs to be at least one bird"
+        assert height > 0 and width > 0, "The world needs a positive height and width, got {}x{}".format(height, width)
+        self.count = count
+        self.height = height
+        self.width = width
+
+        # The birds. Every bird has the same size and x
+        self.bird_height = bird_height
+        self.bird_width = bird_width
+        self.bird_x = bird_x
+        # An instance of Physics, or None for the integer flap and fall. With Physics the birds have float positions
+        # and a velocity each
+        self.physics = physics
+        self.y = np.full(count, bird_y, dtype=np.int64 if physics is None else np.float64)
+        self.vy = np.zeros(count, dtype=np.float64)
+        self.tick_value = np.zeros(count, dtype=np.int64)
+        self.alive = np.ones(count, dtype=bool)
+        self.score = np.zeros(count, dtype=np.int64)
+        self.cause = np.zeros(count, dtype=np.int8)
+        # The tick each bird died on, or -1
+        self.died = np.full(count, -1, dtype=np.int64)
+
+        # The pipes, one entry per pipe, sorted by x
+        self.pipe_x = np.zeros(0, dtype=np.int64)
+        self.pipe_top = np.zeros(0, dtype=np.int64)
+        self.pipe_bottom = np.zeros(0, dtype=np.int64)
+        self.pipe_width = pipe_width
+
+        self.pipe_speed = pipe_speed
+        self.flap_amount = flap_amount
+        self.fall_amount = fall_amount
+
+        self.ticks = 0
+        self.distance = 0
+        self.random = random.Random(seed)
+        swing = None
+        if physics is not None:
+            flap_amount, fall_amount, swing = physics.amounts()
+        self.generator = PipeGenerator(height, self.random, curve=curve, lookahead=lookahead, pipe_width=pipe_width,
+                                       bird_height=bird_height, pipe_speed=pipe_speed, flap_amount=flap_amount,
+                                       fall_amount=fall_amount, swing=swing)
+
+    def start(self, top=None, bottom=None):
+        """
+        Adds the first pipe in the middle of the world, like World.start
+        :param top: The y value for the top of the opening. Defaults to a little above the middle
+        :param bottom: The y value for the bottom of the opening. Defaults to a little below the middle
+        :return: self
+        """
+        top = self.height // 2 - 5 if top is None else top
+        bottom = self.height // 2 + 5 if bottom is None else bottom
+        self.add_pipe(self.width // 2, top, bottom)
+        self.generator.reset(PipeSpec(self.width // 2 + self.distance, top, bottom, self.pipe_width))
+        return self
+
+    def add_pipe(self, x, top, bottom):
+        """
+        Adds a pipe. Pipes are only added every few ticks so growing the arrays here is fine
+        :param x: The left x of the pipe
+        :param top: The y value for the top of the opening of the pipe
+        :param bottom: The y value for the bottom of the opening of the pipe
+        :return: None
+        """
+        self.pipe_x = np.append(self.pipe_x, x)
+        self.pipe_top = np.append(self.pipe_top, top)
+        self.pipe_bottom = np.append(self.pipe_bottom, bottom)
+
+    def generate_pipe(self):
+        """
+        Adds the next planned pipe, the same way World.generate_pipe does
+        :return: None
+        """
+        spec = self.generator.pop(int(self.score.max()))
+        self.add_pipe(spec.x - self.distance, spec.top, spec.bottom)
+
+    def step(self, flaps):
+        """
+        Moves every bird and the pipes forward by one tick. Dead birds stay where they died
+        :param flaps: An array of booleans, one per bird, saying which birds flap this tick
+        :return: How many birds are still alive
+        """
+        flaps = np.asarray(flaps, dtype=bool)
+        alive = self.alive
+
+        # Move the pipes backwards and drop the ones that are completely off of the screen
+        self.pipe_x -= self.pipe_speed
+        self.distance += self.pipe_speed
+        on_screen = self.pipe_x + self.pipe_width > 0
+        if not on_screen.all():
+            self.pipe_x = self.pipe_x[on_screen]
+            self.pipe_top = self.pipe_top[on_screen]
+            self.pipe_bottom = self.pipe_bottom[on_screen]
+
+        physics = self.physics
+        if physics is not None:
+            # The same semi-implicit Euler step as Physics.step, for every bird at once
+            vy = np.where(flaps, -physics.flap_speed, np.minimum(self.vy + physics.gravity * physics.dt,
+                                                                  physics.max_fall))
+            self.vy = np.where(alive, vy, self.vy)
+            self.y += self.vy * physics.dt * alive
+        else:
+            # Flap, coast for one tick, then fall
+            falling = np.where(self.tick_value == 0, 0, self.fall_amount)
+            self.y += np.where(flaps, -self.flap_amount, falling) * alive
+            self.tick_value = np.where(flaps, 0, self.tick_value + 1)
+
+        # Adds the planned pipes that scrolled into view
+        while self.generator.peek().x - self.distance < self.width:
+            self.generate_pipe()
+
+        # The rows the birds are drawn on, like Bird.row
+        top = self.y if physics is None else np.floor(self.y + 0.5)
+        bottom = top + self.bird_height
+        left, right = self.bird_x, self.bird_x + self.bird_width
+
+        # Every bird shares the same x, so only the pipes at that x matter
+        near = (self.pipe_x < right) & (self.pipe_x + self.pipe_width > left)
+        near_top = self.pipe_top[near]
+        near_bottom = self.pipe_bottom[near]
+
+        # Collisions, one column per nearby pipe
+        hit_top = alive & (top <= 0)
+        hit_bottom = alive & ~hit_top & (bottom > self.height)
+        hit_pipe = alive & ~hit_top & ~hit_bottom & (
+            (top[:, None] < near_top) | (bottom[:, None] > near_bottom)).any(axis=1)
+        dead = hit_top | hit_bottom | hit_pipe
+        self.cause[hit_top] = TOP
+        self.cause[hit_bottom] = BOTTOM
+        self.cause[hit_pipe] = PIPE
+        self.died[dead] = self.ticks
+        alive &= ~dead
+
+        # Scoring, like PipeScorer: a point for every pipe whose right side moved past the left side of the birds
+        right_side = self.pipe_x + self.pipe_width
+        passed = int(((right_side <= left) & (right_side + self.pipe_speed > left)).sum())
+        if passed:
+            self.score += alive * passed
+
+        self.ticks += 1
+        return int(alive.sum())
+
+    def run(self, policy, ticks):
+        """
+        Steps until every bird is dead or the tick budget runs out
+        :param policy: A function taking this BatchWorld and returning an array of booleans, one per bird
+        :param ticks: The most ticks to run
+        :return: How many birds are still alive
+        """
+        alive = int(self.alive.sum())
+        for _ in range(ticks):
+            if not alive:
+                break
+            alive = self.step(policy(self))
+        return alive
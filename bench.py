@@ -0,0 +1,220 @@
+#
+# Benchmarks for the world step, collision and rendering
+# Run with: python bench.py [--save results.json] [--baseline results.json]
+#
+
+import argparse
+import json
+import sys
+import timeit
+
+from logic import Bird, Pipe, CollisionEngine, World, Game
+
+# (lines, cols) of the terminals to benchmark
+SIZES = [(24, 80), (60, 200), (120, 400)]
+# How many pipes are in the world
+PIPE_COUNTS = [1, 5, 20]
+
+
+class FakeScreen:
+    """
+    An in memory stand in for stdscr. Counts what would have been written to the terminal
+    """
+
+    def __init__(self, keys=None):
+        self.keys = list(keys or [])
+        self.calls = 0
+        self.cells = 0
+
+    def addstr(self, y, x, text):
+        self.calls += 1
+        self.cells += len(text)
+
+    def refresh(self):
+        pass
+
+    def getch(self):
+        if self.keys:
+            return self.keys.pop(0)
+        return -1
+
+
+def make_world(lines, cols, pipes):
+    """
+    Makes a world with some pipes spread across the screen. The openings of the pipes are lined up with the bird so
+    the bird never dies, and start is not called so no pipes are generated and the number of pipes stays the same
+    :param lines: The height of the world
+    :param cols: The width of the world
+    :param pipes: How many pipes to put in the world
+    :return: An instance of World
+    """
+    world = World(lines, cols)
+    world.bird.build(height=3, width=5, y=lines // 2, x=10)
+    for index in range(pipes):
+        fill(world, index * cols // pipes)
+    return world
+
+
+def fill(world, x):
+    """
+    Adds a pipe that the bird can fly through
+    :param world: An instance of World
+    :param x: The left x of the pipe
+    :return: None
+    """
+    pipe = Pipe(world.pipe_char, yrange=(0, world.height))
+    pipe.build(width=(x, x + 10), top=world.bird.y - 2, bottom=world.bird.y + world.bird.height + 2, assertion=False)
+    world.add_pipe(pipe)
+
+
+def keep_steady(world, lines, cols, pipes):
+    """
+    Puts the bird back where it started and replaces pipes that scrolled off the screen
+    :return: None
+    """
+    world.bird.y = lines // 2
+    while len(world.pipes) < pipes:
+        fill(world, cols)
+
+
+def benchmarks(lines, cols, pipes):
+    """
+    Makes every benchmark for one terminal size and pipe count
+    :return: A list of (name, function to time)
+    """
+    world = make_world(lines, cols, pipes)
+    bird = world.bird
+    score_engine = world.ScoreEngine
+
+    def bird_flap():
+        bird.flap(None, 3)
+        bird.y += 3
+
+    def bird_fall():
+        bird.fall(None, 2)
+        bird.y -= 2
+
+    def pipe_build():
+        Pipe('&', yrange=(0, lines)).build(width=(cols // 2, cols // 2 + 10), top=lines // 3, bottom=lines // 3 * 2,
+                                           assertion=False)
+
+    moving = Pipe('&', yrange=(0, lines))
+    moving.build(width=(cols // 2, cols // 2 + 10), top=lines // 3, bottom=lines // 3 * 2, assertion=False)
+
+    def pipe_move():
+        moving.move(None, 3)
+        moving.x += 3
+
+    def border_collision():
+        CollisionEngine.border_collision(score_engine, bird, lines=lines, exit=False)
+
+    def pipe_collision():
+        CollisionEngine.pipe_collision(score_engine, bird, world.pipes, exit=False)
+
+    def between_pipe():
+        CollisionEngine.between_pipe(score_engine, bird, world.pipes)
+
+    game = Game(bird=Bird(char='#'), sleep=0)
+    game.attach(FakeScreen(), lines, cols)
+    game.world = make_world(lines, cols, pipes)
+    game.bird = game.world.bird
+
+    def game_tick():
+        game.tick()
+        keep_steady(game.world, lines, cols, pipes)
+
+    return [
+        ('Bird.flap', bird_flap),
+        ('Bird.fall', bird_fall),
+        ('Pipe.build', pipe_build),
+        ('Pipe.move', pipe_move),
+        ('CollisionEngine.border_collision', border_collision),
+        ('CollisionEngine.pipe_collision', pipe_collision),
+        ('CollisionEngine.between_pipe', between_pipe),
+        ('Game.tick', game_tick),
+    ]
+
+
+def measure(function, repeat=5):
+    """
+    Times a function
+    :param function: The function to time
+    :param repeat: How many times to repeat the measurement. The fastest is kept
+    :return: Seconds per call
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def run(sizes=SIZES, pipe_counts=PIPE_COUNTS, repeat=5, only=None):
+    """
+    Runs every benchmark for every terminal size and pipe count
+    :param only: If given, only benchmarks whose name contains this string are run
+    :return: A list of dicts with 'name', 'lines', 'cols', 'pipes' and 'seconds'
+    """
+    results = []
+    for lines, cols in sizes:
+        for pipes in pipe_counts:
+            for name, function in benchmarks(lines, cols, pipes):
+                if only is not None and only not in name:
+                    continue
+                results.append({'name': name, 'lines': lines, 'cols': cols, 'pipes': pipes,
+                                'seconds': measure(function, repeat)})
+    return results
+
+
+def key(result):
+    return '{name} {lines}x{cols} pipes={pipes}'.format(**result)
+
+
+def compare(results, baseline, threshold=1.25):
+    """
+    Compares results against a baseline
+    :param results: The results of run
+    :param baseline: Results of an earlier run
+    :param threshold: How many times slower a benchmark can get before it counts as a slowdown
+    :return: A list of (key, baseline seconds, seconds, ratio) for every benchmark that got slower than the threshold
+    """
+    old = {key(result): result['seconds'] for result in baseline}
+    slower = []
+    for result in results:
+        before = old.get(key(result))
+        if before:
+            ratio = result['seconds'] / before
+            if ratio > threshold:
+                slower.append((key(result), before, result['seconds'], ratio))
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the world step, collision and rendering')
+    parser.add_argument('--save', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='Compare the results against this JSON file')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='How many times slower a benchmark can get before it fails the comparison')
+    parser.add_argument('--repeat', type=int, default=5, help='How many times to repeat every measurement')
+    parser.add_argument('--only', help='Only run benchmarks whose name contains this')
+    args = parser.parse_args(argv)
+
+    results = run(repeat=args.repeat, only=args.only)
+    for result in results:
+        print('{:<60} {:>12.3f} us'.format(key(result), result['seconds'] * 1e6))
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        slower = compare(results, baseline, args.threshold)
+        for name, before, after, ratio in slower:
+            print('SLOWER {:<53} {:>10.3f} us -> {:>10.3f} us ({:.2f}x)'.format(name, before * 1e6, after * 1e6, ratio))
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
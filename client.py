@@ -0,0 +1,102 @@
+#
+# A terminal client for server.py
+# The game runs on the server. This only sends key presses and draws the parts of the screen the server says changed
+#
+# Run with: python client.py [--port 7777] [--unix /tmp/flappy.sock]
+#
+
+import argparse
+import asyncio
+import curses
+
+from logic import Game, nothing
+import protocol
+
+# 119 = W key, 114 = R key, 27 = escape
+FLAP_KEYS = (119, curses.KEY_UP)
+RESTART_KEY = 114
+QUIT_KEY = 27
+
+
+async def draw_frames(game, reader):
+    """
+    Draws every frame the server sends until it disconnects
+    :param game: An instance of Game, already entered
+    :param reader: An asyncio.StreamReader
+    :return: None
+    """
+    while True:
+        try:
+            kind, cause, tick, score, inputs, runs = await protocol.read_frame(reader)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        # The game over message is part of the frame, so the next game rubs it out like anything else
+        for y, x, text in runs:
+            game.add(text, y, x, exception=nothing)
+        game.refresh()
+
+
+async def send_keys(game, writer, poll_interval):
+    """
+    Sends key presses to the server until the escape key is pressed
+    :param game: An instance of Game, already entered
+    :param writer: An asyncio.StreamWriter
+    :param poll_interval: How many seconds between reads of the keyboard
+    :return: None
+    """
+    while True:
+        keys = game.drain_input()
+        if QUIT_KEY in keys:
+            writer.write(bytes([protocol.QUIT]))
+            await writer.drain()
+            return
+        if RESTART_KEY in keys:
+            writer.write(bytes([protocol.RESTART]))
+        if any(key in FLAP_KEYS for key in keys):
+            writer.write(bytes([protocol.FLAP]))
+        await asyncio.sleep(poll_interval)
+
+
+async def play(game, host='127.0.0.1', port=7777, unix=None, poll_interval=0.005):
+    """
+    Connects to a server and plays until the escape key is pressed or the server goes away
+    :param game: An instance of Game, already entered
+    :param host: The address of the server
+    :param port: The TCP port of the server
+    :param unix: A Unix socket path to connect to instead of TCP
+    :param poll_interval: How many seconds between reads of the keyboard
+    :return: None
+    """
+    if unix is not None:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    writer.write(protocol.HELLO.pack(curses.LINES, curses.COLS))
+
+    tasks = [asyncio.ensure_future(draw_frames(game, reader)),
+             asyncio.ensure_future(send_keys(game, writer, poll_interval))]
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        for task in done:
+            task.result()
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Plays Glappy Gird on a server')
+    parser.add_argument('--host', default='127.0.0.1', help='The address of the server')
+    parser.add_argument('--port', type=int, default=7777, help='The TCP port of the server')
+    parser.add_argument('--unix', help='Connect to this Unix socket instead of TCP')
+    args = parser.parse_args(argv)
+
+    # Game sets up and restores the terminal. Its world is not used, the server has the real one
+    with Game() as game:
+        asyncio.run(play(game, args.host, args.port, args.unix))
+
+
+if __name__ == '__main__':
+    main()
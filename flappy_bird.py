@@ -2,36 +2,135 @@
 # Made by Ben Maydan
 # A curses exception is caused by curses.ERR
 
-from logic import Game, Bird, Pipe, CollisionEngine, increasing
-import curses
+from logic import Game, Bird
+import argparse
 import time
-import sys
 
+# How many seconds one tick takes
+TICK = 0.2
+# Where the bird and the first pipe start
+LAYOUT = dict(bird_height=3, bird_width=5, bird_y=10, bird_x=10, pipe_width=10, top=20, bottom=30)
 
-def save_highscore(score):
+
+def save_highscore(game, player, path='highscores.db'):
     """
     Saves a highscore to a file
-    :param score: The score gotten by the user
-    :return: None
+    :param game: The game that just ended
+    :param player: The name of the player
+    :param path: The high score database
+    :return: The best score the player has ever gotten
+    """
+    # sqlite3 is only needed once the game is over
+    from scores import ScoreStore, config_key
+    world = game.world
+    with ScoreStore(path, batch_size=1) as store:
+        store.add(player, world.ScoreEngine.score(), seed=world.seed, config=config_key(world), ticks=world.ticks,
+                  cause=None if world.collision is None else world.collision.kind)
+        return store.best(player=player)
+
+
+def seed(text):
     """
+    Reads the --seed option
+    :param text: The option as it was typed
+    :return: An int
+    """
+    value = int(text)
+    # A recording stores the seed in 8 bytes
+    if not 0 <= value < 2 ** 64:
+        raise argparse.ArgumentTypeError('the seed must be from 0 to 2**64 - 1, not {}'.format(value))
+    return value
 
 
-bird = Bird(title='Mr.', name='Glappy Glird', char='#')
+parser = argparse.ArgumentParser(description='Glappy Gird, a Flappy Bird clone')
+parser.add_argument('--seed', type=seed, help='The seed for the pipes. The same seed always makes the same pipes')
+parser.add_argument('--record', help='Save a recording of the game to this file. Check it with replay.py')
+parser.add_argument('--player', default='Glappy Glird', help='Your name for the high score table')
+parser.add_argument('--physics', action='store_true',
+                    help='Move the bird with gravity and velocity instead of whole rows at a time')
+parser.add_argument('--colour', action='store_true', help='Draw the bird and the pipes in colour')
+parser.add_argument('--autopilot', help='Let an agent trained with agent.py fly the bird. Keys still flap too')
+parser.add_argument('--hud', action='store_true', help='Draw the p50 / p95 / p99 time of every stage of a tick')
+parser.add_argument('--profile', help='Save the time of every stage of a tick to this file when the game ends. A '
+                                      'name ending in .csv writes CSV, anything else writes JSON')
+parser.add_argument('--async', dest='asynchronous', action='store_true',
+                    help='Read keys, move the world and draw in separate asyncio tasks')
 
 
-with Game(bird=bird, sleep=0.2) as game:
-    # Add a bird
-    game.long_add(bird.char, bird.build(height=3, width=5, y=10, x=10))
+def make_game(args):
+    """
+    Makes the game the options ask for. Only what the options use is imported
+    :param args: The parsed options
+    :return: An instance of Game. It still needs to be entered
+    """
+    physics = None
+    if args.physics:
+        from physics import Physics
+        physics = Physics(dt=TICK)
+    autopilot = None
+    if args.autopilot:
+        from agent import QAgent
+        autopilot = QAgent.load(args.autopilot)
+        # A table learned with one movement flies the other one straight into the ground
+        if autopilot.physics != (None if physics is None else physics.settings()):
+            trained = 'without physics' if autopilot.physics is None else \
+                'with physics' if physics is None else 'with different physics'
+            parser.error('{} was trained {}. Train it again with the same --physics as the game'.format(
+                args.autopilot, trained))
+    profiler = None
+    if args.profile:
+        from profiling import Profiler
+        profiler = Profiler()
+    bird = Bird(title='Mr.', name=args.player, char='#')
+    return Game(bird=bird, sleep=TICK, fps=30, profiler=profiler, hud=args.hud, seed=args.seed, record=args.record,
+                physics=physics, colour=args.colour, autopilot=autopilot)
 
-    # First pipe
-    pipe = Pipe(char='&')
-    game.add_pipe(pipe)
-    game.long_add(pipe.char, pipe.build(width=(curses.COLS // 2, curses.COLS // 2 + 10), top=20, bottom=30))
+
+def first_frame(game, mark=None):
+    """
+    Adds the bird and the first pipe and draws them
+    :param game: An instance of Game, attached to a screen
+    :param mark: Called with the name of every stage as it finishes, like launcher.StartupTimer.mark. None for none
+    :return: None
+    """
+    game.world.start(**LAYOUT)
+    if mark is not None:
+        mark('world')
+    game.draw(game.world)
     game.refresh()
+    if mark is not None:
+        mark('first frame')
+
 
-    # The game continues as long as the escape key (ASCII 27) is not pressed
-    while game.getch() != 27:
-        game.tick()
-        # curses.flushinp()
-    save_highscore(100)
+def play(game, args):
+    """
+    Plays until the bird hits something or the escape key is pressed, then saves the score
+    :param game: An instance of Game, entered and with its first frame drawn
+    :param args: The parsed options
+    :return: None
+    """
+    # The game continues as long as the escape key (ASCII 27) is not pressed or the bird hits something
+    try:
+        if args.asynchronous:
+            game.run_async()
+        else:
+            game.run()
+    finally:
+        save_highscore(game, args.player)
+        if args.profile:
+            if args.profile.endswith('.csv'):
+                game.profiler.export_csv(args.profile)
+            else:
+                game.profiler.export_json(args.profile)
     time.sleep(3)
+
+
+def main(argv=None):
+    args = parser.parse_args(argv)
+    with make_game(args) as game:
+        first_frame(game)
+        play(game, args)
+
+
+if __name__ == '__main__':
+    main()
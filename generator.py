@@ -0,0 +1,225 @@
+#
+# Procedural pipe generation
+# Pipes are planned ahead of time as PipeSpecs in a ring buffer. A spec only becomes a Pipe when it scrolls into view
+#
+# Check that every planned pipe can be passed with: python generator.py
+#
+
+import argparse
+import collections
+import random
+import sys
+
+# A planned pipe. x is measured from where the world started, so it does not change as the world scrolls
+PipeSpec = collections.namedtuple('PipeSpec', ['x', 'top', 'bottom', 'width'])
+
+
+class Constant:
+    """
+    A difficulty curve that never gets harder
+    """
+
+    def __init__(self, gap=20, spacing=16):
+        """
+        :param gap: The height of the opening of every pipe
+        :param spacing: The number of columns between one pipe and the next
+        """
+        self.gap = gap
+        self.spacing = spacing
+
+    def __call__(self, score):
+        return self.gap, self.spacing
+
+
+class Linear:
+    """
+    A difficulty curve where the openings get smaller and the pipes get closer together as the score goes up
+    """
+
+    def __init__(self, gap=20, min_gap=8, spacing=16, min_spacing=8, every=10):
+        """
+        :param gap: The height of the openings at a score of 0
+        :param min_gap: The smallest the openings get
+        :param spacing: The number of columns between pipes at a score of 0
+        :param min_spacing: The smallest number of columns between pipes
+        :param every: How many points it takes for the openings and the spacing to shrink by one
+        """
+        self.gap = gap
+        self.min_gap = min_gap
+        self.spacing = spacing
+        self.min_spacing = min_spacing
+        self.every = every
+
+    def __call__(self, score):
+        shrink = score // self.every
+        return max(self.gap - shrink, self.min_gap), max(self.spacing - shrink, self.min_spacing)
+
+
+class PipeGenerator:
+    """
+    Plans the pipes ahead of time
+
+    A ring buffer holds the next few pipes. Taking one from the front plans one more at the back, so the cost of
+    generating is the same small amount for every pipe. Every planned opening is guaranteed to be reachable from the
+    one before it: the bird has (spacing / pipe speed) ticks between pipes and can climb or fall at least
+    min(flap, fall) rows every tick, so the opening never moves further than that unless it contains the whole of the
+    last opening
+    """
+
+    def __init__(self, height, rng, curve=None, lookahead=16, pipe_width=10, bird_height=3, pipe_speed=3,
+                 flap_amount=3, fall_amount=2, margin=2, swing=None):
+        """
+        :param height: The height of the world
+        :param rng: An instance of random.Random
+        :param curve: A function taking the score and returning (gap, spacing). Defaults to Linear()
+        :param lookahead: How many pipes to plan ahead
+        :param pipe_width: The width of every pipe
+        :param bird_height: The height of the bird, used to keep every opening big enough
+        :param pipe_speed: How many columns the pipes move every tick
+        :param flap_amount: How many rows a flap moves the bird up
+        :param fall_amount: How many rows the bird falls every tick
+        :param margin: The fewest rows of pipe above and below every opening
+        :param swing: How many rows the bird moves up and down while it holds its height. Defaults to flap_amount,
+        since the integer movement flaps up and falls back to where it was
+        """
+        assert lookahead > 0, "The generator needs to plan at least one pipe ahead"
+        self.height = height
+        self.rng = rng
+        self.curve = Linear() if curve is None else curve
+        self.pipe_width = pipe_width
+        self.pipe_speed = pipe_speed
+        self.climb = min(flap_amount, fall_amount)
+        self.margin = margin
+        # The smallest opening the bird can fly through while flapping and falling
+        self.min_gap = bird_height + (flap_amount if swing is None else swing) + 1
+        # The ring buffer. head is the next pipe to come out
+        self.buffer = [None] * lookahead
+        self.head = 0
+        self.last = None
+
+    def reset(self, first, score=0):
+        """
+        Plans every pipe after a first pipe
+        :param first: An instance of PipeSpec that the next pipes follow
+        :param score: The score used to pick the difficulty
+        :return: None
+        """
+        self.last = first
+        self.head = 0
+        for index in range(len(self.buffer)):
+            self.buffer[index] = self.last = self.plan(self.last, score)
+
+    def plan(self, previous, score):
+        """
+        Plans the pipe after another pipe
+        :param previous: An instance of PipeSpec
+        :param score: The score used to pick the difficulty
+        :return: An instance of PipeSpec
+        """
+        gap, spacing = self.curve(score)
+        gap = min(max(gap, self.min_gap), self.height - 2 * self.margin)
+        spacing = max(spacing, 1)
+
+        # How far the opening can move and still be reachable from the last one
+        reach = (spacing // self.pipe_speed) * self.climb
+        low = max(self.margin, previous.top - reach)
+        high = min(self.height - self.margin - gap, previous.top + reach)
+        if low > high:
+            # The opening does not fit within reach at this size, like after a first pipe that reaches into the
+            # margin. It goes as close to the last opening as it can and shrinks to fit, but never below min_gap
+            top = min(max(previous.top - reach, self.margin), previous.top + reach)
+            gap = max(min(gap, self.height - self.margin - top), min(self.min_gap, gap))
+            # Only an opening of min_gap that still does not fit goes into the margin
+            low = high = max(min(top, self.height - gap), 0)
+        # Drawn even when there is one choice, so a seed plans the same pipes it always has
+        top = self.rng.randint(low, high)
+        return PipeSpec(previous.x + previous.width + spacing, top, top + gap, self.pipe_width)
+
+    def peek(self):
+        """
+        :return: The next pipe, without taking it
+        """
+        return self.buffer[self.head]
+
+    def pop(self, score=0):
+        """
+        Takes the next pipe and plans another one at the back of the buffer
+        :param score: The score used to pick the difficulty of the pipe that gets planned
+        :return: An instance of PipeSpec
+        """
+        spec = self.buffer[self.head]
+        self.buffer[self.head] = self.last = self.plan(self.last, score)
+        self.head = (self.head + 1) % len(self.buffer)
+        return spec
+
+    def passable(self, previous, spec):
+        """
+        Checks that an opening can be reached from the one before it
+        :param previous: An instance of PipeSpec
+        :param spec: The PipeSpec after it
+        :return: True or False
+        """
+        if spec.bottom - spec.top < self.min_gap:
+            return False
+        if spec.top <= previous.top and spec.bottom >= previous.bottom:
+            return True
+        spacing = spec.x - previous.x - previous.width
+        return abs(spec.top - previous.top) <= (spacing // self.pipe_speed) * self.climb
+
+
+def check(height, first, pipes=1000, seed=0, **options):
+    """
+    Plans pipes after a first pipe and finds the ones that can not be reached from the pipe before them
+    :param height: The height of the world
+    :param first: An instance of PipeSpec, like the first pipe World.start builds
+    :param pipes: How many pipes to plan. The score goes up by one every pipe, so the hardest part of the curve is
+    checked too
+    :param seed: The seed for the generator
+    :param options: Passed to PipeGenerator
+    :return: A list of (previous, spec) for every pipe that can not be passed
+    """
+    generator = PipeGenerator(height, random.Random(seed), **options)
+    generator.reset(first)
+    failures = []
+    previous = first
+    for score in range(pipes):
+        spec = generator.pop(score)
+        if not generator.passable(previous, spec):
+            failures.append((previous, spec))
+        previous = spec
+    return failures
+
+
+def main(argv=None):
+    # Only needed to check the start of the real game
+    from flappy_bird import LAYOUT, TICK
+    from physics import Physics
+
+    parser = argparse.ArgumentParser(description='Checks that every planned pipe can be passed, starting from the '
+                                                 'first pipe of flappy_bird.py')
+    parser.add_argument('--heights', default='30-80', help='The heights of the worlds to check, as LOW-HIGH')
+    parser.add_argument('--seeds', type=int, default=20, help='How many seeds to check at every height')
+    parser.add_argument('--pipes', type=int, default=1000, help='How many pipes to plan for every seed')
+    args = parser.parse_args(argv)
+    low, high = (int(part) for part in args.heights.split('-'))
+
+    failed = 0
+    for name, physics in (('integer', None), ('physics', Physics(dt=TICK))):
+        options = dict(pipe_width=LAYOUT['pipe_width'], bird_height=LAYOUT['bird_height'])
+        if physics is not None:
+            options.update(zip(('flap_amount', 'fall_amount', 'swing'), physics.amounts()))
+        for height in range(max(low, LAYOUT['bottom']), high + 1):
+            first = PipeSpec(0, LAYOUT['top'], LAYOUT['bottom'], LAYOUT['pipe_width'])
+            for seed in range(args.seeds):
+                failures = check(height, first, args.pipes, seed, **options)
+                if failures:
+                    failed += 1
+                    previous, spec = failures[0]
+                    print('{} height {} seed {}: {} can not be reached from {}'.format(name, height, seed, spec,
+                                                                                       previous))
+    print('{} sequences could not be passed'.format(failed))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#
+# Starts Glappy Gird as quickly as possible
+# Nothing is imported before it is needed, so the first frame is drawn before the score database, the physics or the
+# agent are loaded. The time from launch to the first frame can be measured, with or without a terminal
+#
+# Play with: python launcher.py [the options of flappy_bird.py]
+# Measure with: python launcher.py --measure [--headless]
+#
+
+import time
+
+# Taken before anything else is imported, so the imports are measured too
+LAUNCHED = time.perf_counter()
+
+import argparse
+import sys
+
+
+class StartupTimer:
+    """
+    Notes how long after launch every stage of starting up finished
+    """
+
+    def __init__(self, start=LAUNCHED):
+        """
+        :param start: The time.perf_counter() value of the launch
+        """
+        self.start = start
+        self.marks = []
+
+    def mark(self, name):
+        """
+        Notes that a stage just finished
+        :param name: The name of the stage
+        :return: None
+        """
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    def report(self):
+        """
+        The time of every stage since launch, and how long the stage itself took
+        :return: A string with one line per stage
+        """
+        lines = []
+        previous = 0.0
+        for name, seconds in self.marks:
+            lines.append('{:<12} {:8.2f} ms  (+{:.2f} ms)'.format(name, seconds * 1000, (seconds - previous) * 1000))
+            previous = seconds
+        return '\n'.join(lines)
+
+
+class MemoryScreen:
+    """
+    A stand in for a curses window that draws nowhere, for measuring startup without a terminal
+    """
+
+    def __init__(self, lines, cols):
+        self.lines = lines
+        self.cols = cols
+        self.writes = 0
+
+    def addstr(self, y, x, text, attr=0):
+        self.writes += 1
+
+    def getch(self):
+        return -1
+
+    def getmaxyx(self):
+        return self.lines, self.cols
+
+    def refresh(self):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Starts Glappy Gird. Every other option is passed to flappy_bird.py',
+                                     add_help=False)
+    parser.add_argument('--measure', action='store_true', help='Print how long startup took and quit after the '
+                                                                'first frame')
+    parser.add_argument('--headless', action='store_true',
+                        help='Draw into memory instead of the terminal. Implies --measure')
+    parser.add_argument('--size', default='50x120', help='The size of the headless screen, as HEIGHTxWIDTH')
+    args, rest = parser.parse_known_args(argv)
+
+    timer = StartupTimer()
+    import flappy_bird
+    timer.mark('imports')
+    options = flappy_bird.parser.parse_args(rest)
+    game = flappy_bird.make_game(options)
+    timer.mark('game')
+
+    if args.headless:
+        lines, cols = (int(part) for part in args.size.split('x'))
+        game.attach(MemoryScreen(lines, cols), lines, cols)
+        timer.mark('screen')
+        flappy_bird.first_frame(game, timer.mark)
+        print(timer.report())
+        return 0
+
+    with game:
+        timer.mark('screen')
+        flappy_bird.first_frame(game, timer.mark)
+        if not args.measure:
+            flappy_bird.play(game, options)
+    # Printed after curses has given the terminal back
+    if args.measure:
+        print(timer.report())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
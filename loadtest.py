@@ -0,0 +1,151 @@
+#
+# Load tests server.py
+# Connects many simulated clients at once. Every client flaps at random, starts a new game whenever its bird dies and
+# times how long each flap takes to show up in a frame
+#
+# Run with: python loadtest.py --clients 200 --seconds 10 [--spawn]
+#
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+
+from profiling import Profiler
+import protocol
+
+
+class Stats:
+    """
+    What every simulated client measured, added together
+    """
+
+    def __init__(self):
+        self.profiler = Profiler(samples=1000000)
+        self.frames = 0
+        self.bytes = 0
+        self.games = 0
+        self.errors = 0
+
+
+async def client(stats, deadline, host, port, unix, height, width, flap_chance, rng):
+    """
+    One simulated client
+    :param stats: An instance of Stats
+    :param deadline: When to stop, from time.perf_counter
+    :param flap_chance: How likely the client is to flap after every frame
+    :param rng: An instance of random.Random
+    :return: None
+    """
+    clock = time.perf_counter
+    try:
+        if unix is not None:
+            reader, writer = await asyncio.open_unix_connection(unix)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.errors += 1
+        return
+    writer.write(protocol.HELLO.pack(height, width))
+
+    # When each input was sent, waiting for a frame that acted on it
+    sent = []
+    count = 0
+    try:
+        while clock() < deadline:
+            remaining = deadline - clock()
+            try:
+                kind, cause, tick, score, inputs, runs = await asyncio.wait_for(protocol.read_frame(reader),
+                                                                                remaining)
+            except asyncio.TimeoutError:
+                break
+            now = clock()
+            stats.frames += 1
+            stats.bytes += protocol.FRAME.size + sum(protocol.RUN.size + len(text.encode()) for y, x, text in runs)
+
+            # inputs says how many of our bytes the server has acted on
+            acted = inputs - (count - len(sent))
+            for started in sent[:acted]:
+                stats.profiler.record('latency', now - started)
+            del sent[:max(acted, 0)]
+
+            if kind == protocol.OVER:
+                stats.games += 1
+                writer.write(bytes([protocol.RESTART]))
+            elif rng.random() < flap_chance:
+                writer.write(bytes([protocol.FLAP]))
+            else:
+                continue
+            sent.append(now)
+            count += 1
+    except (asyncio.IncompleteReadError, ConnectionError):
+        stats.errors += 1
+    finally:
+        writer.close()
+
+
+async def load(clients, seconds, host='127.0.0.1', port=7777, unix=None, height=50, width=120, flap_chance=0.3,
+               seed=0):
+    """
+    Runs simulated clients against a server that is already running
+    :param clients: How many clients
+    :param seconds: How long to run for
+    :return: An instance of Stats
+    """
+    stats = Stats()
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(*[client(stats, deadline, host, port, unix, height, width, flap_chance,
+                                  random.Random(seed + index)) for index in range(clients)])
+    return stats
+
+
+def report(stats, clients, seconds):
+    latency = stats.profiler.stats().get('latency')
+    print('{} clients for {}s: {} frames ({:.0f}/s), {} bytes ({:.1f} KB/s), {} games, {} errors'.format(
+        clients, seconds, stats.frames, stats.frames / seconds, stats.bytes, stats.bytes / seconds / 1024,
+        stats.games, stats.errors))
+    if latency is not None:
+        print('input to frame latency: p50 {:.1f}ms p95 {:.1f}ms p99 {:.1f}ms max {:.1f}ms over {} inputs'.format(
+            latency['p50'] * 1000, latency['p95'] * 1000, latency['p99'] * 1000, latency['max'] * 1000,
+            latency['count']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load tests server.py with simulated clients')
+    parser.add_argument('--clients', type=int, default=100, help='How many clients to connect')
+    parser.add_argument('--seconds', type=float, default=10, help='How long to run for')
+    parser.add_argument('--host', default='127.0.0.1', help='The address of the server')
+    parser.add_argument('--port', type=int, default=7777, help='The TCP port of the server')
+    parser.add_argument('--unix', help='Connect to this Unix socket instead of TCP')
+    parser.add_argument('--size', default='50x120', help='The screen size every client asks for, as HEIGHTxWIDTH')
+    parser.add_argument('--flap-chance', type=float, default=0.3, help='How likely a client is to flap every frame')
+    parser.add_argument('--spawn', action='store_true', help='Start a server for the test and stop it afterwards')
+    parser.add_argument('--tick', type=float, default=0.1, help='The tick length of a spawned server')
+    args = parser.parse_args(argv)
+    height, width = (int(part) for part in args.size.split('x'))
+
+    server = None
+    if args.spawn:
+        # Found next to this file, so the test can be run from any directory
+        server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+        command = [sys.executable, server_path, '--tick', str(args.tick), '--report', str(args.seconds)]
+        command += ['--unix', args.unix] if args.unix is not None else ['--host', args.host, '--port', str(args.port)]
+        server = subprocess.Popen(command)
+        # Gives the server time to start listening
+        time.sleep(1)
+    try:
+        stats = asyncio.run(load(args.clients, args.seconds, args.host, args.port, args.unix, height, width,
+                                 args.flap_chance))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    report(stats, args.clients, args.seconds)
+    return 1 if stats.errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
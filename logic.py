@@ -4,18 +4,32 @@
 # Curses coordinates are accessed like this: (y, x)
 #
 
-import itertools
-import traceback
+import collections
 import time
-import curses
+import os
 import sys
 import random
 
+from render import Renderer, DiffRenderer, Viewport
+from scheduler import Scheduler, drain
+from profiling import NullProfiler, Profiler, TimingOverlay
+from generator import PipeGenerator, PipeSpec
+from physics import quantize
+
 
 def nothing():
     pass
 
 
+def screen_size():
+    """
+    The size of the curses screen. curses is only imported when something needs it, so headless code never loads it
+    :return: (lines, cols)
+    """
+    import curses
+    return curses.LINES, curses.COLS
+
+
 def increasing(values, amount):
     """
     Checks if every value in a list of values increases by some arbitrary amount
@@ -29,82 +43,308 @@ def increasing(values, amount):
     return True
 
 
+# Sent to the subscribers of a ScoreEngine every time the score goes up. tick and pipe are None if they are not known
+ScoreEvent = collections.namedtuple('ScoreEvent', ['score', 'tick', 'pipe'])
+
+
 class ScoreEngine:
     """
-    A blueprint class for detecting if the bird is in between the pipes, granting one score
-
-    Possibly use map / filter / reduce for checking if bird is in the pipe
+    Holds the score. Anything that needs to know when the score goes up, like a HUD, a score store or a recorder, can
+    subscribe to it instead of checking the score every tick
     """
 
+    __slots__ = ('_score', 'increment', 'subscribers')
+
     def __init__(self, increment=1):
         assert increment > 0, "The score needs to increment by more than 0 every time the bird goes through a pipe!"
         self._score = 0
         self.increment = increment
+        self.subscribers = []
 
     def score(self):
         return self._score
 
-    def increase_score(self):
+    def subscribe(self, callback):
+        """
+        Calls a function every time the score goes up
+        :param callback: A function taking an instance of ScoreEvent
+        :return: None
+        """
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """
+        Stops calling a function added with subscribe
+        :param callback: The function
+        :return: None
+        """
+        self.subscribers.remove(callback)
+
+    def increase_score(self, tick=None, pipe=None):
         """
-        Increments self.score by self.increment
+        Increments self.score by self.increment and tells the subscribers
+        :param tick: The tick the score went up on
+        :param pipe: The pipe that was passed
         :return: self.score
         """
         self._score += self.increment
-        return self.score()
+        if self.subscribers:
+            event = ScoreEvent(self._score, tick, pipe)
+            for callback in self.subscribers:
+                callback(event)
+        return self._score
+
+
+# What the bird hit. kind is 'top', 'bottom' or 'pipe' and pipe is the pipe that was hit, if any
+Collision = collections.namedtuple('Collision', ['kind', 'pipe'])
+
+
+class PipeIndex:
+    """
+    The pipes in the world, sorted by their left x
+
+    Every pipe moves backwards by the same amount every tick so the order never changes. That lets collision checks
+    binary search for the one or two pipes near the bird instead of looking at every pipe
+    """
+
+    def __init__(self, pipes=()):
+        self._pipes = []
+        # The width of the widest pipe ever added. Used to know how far left of the bird to start searching
+        self.widest = 0
+        for pipe in pipes:
+            self.add(pipe)
+
+    def __len__(self):
+        return len(self._pipes)
+
+    def __iter__(self):
+        return iter(self._pipes)
+
+    def __getitem__(self, item):
+        return self._pipes[item]
+
+    def _bisect(self, x):
+        """
+        Finds the index of the first pipe whose left x is at least x
+        :param x: The x coordinate
+        :return: An index into self._pipes
+        """
+        pipes = self._pipes
+        low, high = 0, len(pipes)
+        while low < high:
+            middle = (low + high) // 2
+            if pipes[middle].x < x:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def add(self, pipe):
+        """
+        Adds a pipe, keeping the pipes sorted by x
+        :param pipe: An instance of the Pipe class
+        :return: None
+        """
+        self.widest = max(self.widest, pipe.width)
+        # New pipes are almost always the furthest right
+        if not self._pipes or pipe.x >= self._pipes[-1].x:
+            self._pipes.append(pipe)
+        else:
+            self._pipes.insert(self._bisect(pipe.x), pipe)
+
+    def remove(self, pipe):
+        """
+        Removes a pipe
+        :param pipe: An instance of the Pipe class
+        :return: None
+        """
+        self._pipes.remove(pipe)
+
+    def pop_left(self):
+        """
+        Removes the leftmost pipe
+        :return: The pipe
+        """
+        return self._pipes.pop(0)
+
+    def first_right_of(self, x):
+        """
+        Finds the leftmost pipe whose right side is past an x value
+        :param x: The x value
+        :return: An instance of Pipe, or None
+        """
+        pipes = self._pipes
+        for index in range(self._bisect(x - self.widest + 1), len(pipes)):
+            pipe = pipes[index]
+            if pipe.x + pipe.width > x:
+                return pipe
+        return None
+
+    def near(self, left, right):
+        """
+        Finds the pipes that overlap a range of x values
+        :param left: The leftmost x value
+        :param right: One past the rightmost x value
+        :return: A list of pipes
+        """
+        pipes = self._pipes
+        found = []
+        for index in range(self._bisect(left - self.widest + 1), len(pipes)):
+            pipe = pipes[index]
+            if pipe.x >= right:
+                break
+            if pipe.x + pipe.width > left:
+                found.append(pipe)
+        return found
+
+
+class PipeScorer:
+    """
+    Gives one point for every pipe the bird gets past
+
+    Only the next pipe in front of the bird is looked at. A point is given once the left side of the bird passes the
+    right side of that pipe, then the next pipe is found. That makes every tick O(1), and a pipe can never give more
+    than one point
+    """
+
+    __slots__ = ('score_engine', 'next_pipe')
+
+    def __init__(self, score_engine):
+        self.score_engine = score_engine
+        # The first pipe the bird has not gotten past yet
+        self.next_pipe = None
+
+    def update(self, bird, pipes, tick=None):
+        """
+        Gives a point for every pipe the bird got past since the last update
+        :param bird: An instance of Bird
+        :param pipes: An instance of PipeIndex
+        :param tick: The current tick, passed on to the score event
+        :return: How many pipes were passed
+        """
+        passed = 0
+        pipe = self.next_pipe
+        if pipe is None:
+            pipe = self.next_pipe = pipes.first_right_of(bird.x)
+        while pipe is not None and bird.x >= pipe.x + pipe.width:
+            self.score_engine.increase_score(tick, pipe)
+            passed += 1
+            pipe = self.next_pipe = pipes.first_right_of(bird.x)
+        return passed
 
 
 class CollisionEngine:
     """
     A blueprint for checking collision between the bird and the pipes currently on the screen
 
-    Possibly use map / filter / reduce for checking collision
-    Or write these methods in cython to increase speed slightly
+    Every check is an axis aligned box test on the rectangles of the bird and the pipes, so nothing here depends on
+    how big the screen is
     """
 
+    # What gets printed when the game ends because of a collision
+    messages = {
+        'top': "{} {} touched the top of the screen!\nYour score was {}",
+        'bottom': "GAME OVER!\n{} {} touched the bottom of the screen!\nYour score was {}",
+        'pipe': "{} {} touched a pipe!\nYour score was: {}",
+    }
+
     @staticmethod
-    def border_collision(score_engine, bird):
+    def game_over(collision, score_engine, bird, lines=None):
         """
-        Checks for collision between the bird and the border
+        Prints why the game ended and exits
+        :param collision: An instance of Collision, or what the bird collided with as a key of CollisionEngine.messages
+        :param score_engine: An instance of the ScoreEngine class
+        :param bird: An instance of the Bird class
+        :param lines: The height of the screen. Defaults to curses.LINES
+        :return: None
+        """
+        if lines is None:
+            lines = screen_size()[0]
+        if isinstance(collision, Collision):
+            collision = collision.kind
+        half = (int(lines / 2) * "\n")
+        print(half + CollisionEngine.messages[collision].format(bird.title, bird.name, score_engine.score()) + half)
+        sys.exit()
+
+    @staticmethod
+    def overlaps(first, second):
+        """
+        Checks if two rectangles overlap
+        :param first: (y, x, height, width)
+        :param second: (y, x, height, width)
         :return: True or False
         """
-        # To improve performance checking for border collision
-        # Only the top left and the bottom right of the bird are checked if they are touching the border
-        top_left = bird.coordinates[0]
-        bottom_right = bird.coordinates[-1]
+        return (first[0] < second[0] + second[2] and second[0] < first[0] + first[2] and
+                first[1] < second[1] + second[3] and second[1] < first[1] + first[3])
+
+    @staticmethod
+    def nearby(bird, pipes):
+        """
+        The pipes that share at least one column with the bird
+        :param bird: An instance of the Bird class
+        :param pipes: An instance of PipeIndex, or any iterable of pipes
+        :return: A list of pipes
+        """
+        left, right = bird.x, bird.x + bird.width
+        if isinstance(pipes, PipeIndex):
+            return pipes.near(left, right)
+        return [pipe for pipe in pipes if pipe.x < right and pipe.x + pipe.width > left]
 
-        half = (int(curses.LINES / 2) * "\n")
-        assert isinstance(bird, Bird), "Bird needs to be an instance of the bird class to access it's title and name!"
+    @staticmethod
+    def check(bird, pipes, lines):
+        """
+        Checks for every kind of collision without printing or exiting. Cheap enough to call in a tight loop
+        :param bird: An instance of the Bird class
+        :param pipes: An instance of PipeIndex, or any iterable of pipes
+        :param lines: The height of the screen
+        :return: An instance of Collision, or None
+        """
+        return CollisionEngine.border_collision(None, bird, lines=lines, exit=False) or \
+            CollisionEngine.pipe_collision(None, bird, pipes, lines=lines, exit=False)
 
+    @staticmethod
+    def border_collision(score_engine, bird, lines=None, exit=True):
+        """
+        Checks for collision between the bird and the border
+        :param lines: The height of the screen. Defaults to curses.LINES
+        :param exit: Whether the game should exit on a collision. When False the collision is returned instead
+        :return: An instance of Collision, or None
+        """
+        if lines is None:
+            lines = screen_size()[0]
+
+        collision = None
+        y = bird.row
         # Touching the top of the screen
-        if top_left[0] == 0:
-            print(half + "{} {} touched the top of the screen!\nYour score was {}".format(
-                bird.title, bird.name,
-                score_engine.score()) + half)
-            sys.exit()
+        if y <= 0:
+            collision = Collision('top', None)
         # Touching the bottom of the screen
-        if bottom_right[0] >= curses.LINES:
-            print(half + "GAME OVER!\n{} {} touched the bottom of the screen!\nYour score was {}".format(
-                bird.title,
-                bird.name,
-                score_engine.score()) + half)
-            sys.exit()
+        elif y + bird.height > lines:
+            collision = Collision('bottom', None)
+
+        if collision is not None and exit:
+            CollisionEngine.game_over(collision, score_engine, bird, lines)
+        return collision
 
     @staticmethod
-    def pipe_collision(score_engine, bird, pipes):
+    def pipe_collision(score_engine, bird, pipes, lines=None, exit=True):
         """
-        Checks for collision between the bird and a pipe
-        :return: None
+        Checks for collision between the bird and a pipe. Only the pipes that share a column with the bird are checked
+        :param pipes: An instance of PipeIndex, or any iterable of pipes
+        :param lines: The height of the screen. Defaults to curses.LINES
+        :param exit: Whether the game should exit on a collision. When False the collision is returned instead
+        :return: An instance of Collision, or None
         """
-        half = (int(curses.LINES / 2) * "\n")
-        assert isinstance(bird, Bird)
-
-        for pipe in pipes:
-            for coordinate in bird.border_coordinates:
-                if coordinate in pipe.border_coordinates:
-                    print(half + "{} {} touched a pipe!\nYour score was: {}".format(bird.title,
-                                                                                    bird.name,
-                                                                                    score_engine.score()) + half)
-                    sys.exit()
+        top = bird.row
+        bottom = top + bird.height
+        for pipe in CollisionEngine.nearby(bird, pipes):
+            # The columns overlap, so the bird hits the pipe unless it is completely inside the opening
+            if top < pipe.top or bottom > pipe.bottom:
+                collision = Collision('pipe', pipe)
+                if exit:
+                    CollisionEngine.game_over(collision, score_engine, bird, lines)
+                return collision
+        return None
 
     @staticmethod
     def between_pipe(score_engine, bird, pipes):
@@ -112,45 +352,80 @@ class CollisionEngine:
         Checks if the bird is between a pipe
         :param score_engine: An instance of the ScoreEngine class
         :param bird: An instance of the Bird class
-        :param pipes: A list of all of the pipes on the screen
+        :param pipes: An instance of PipeIndex, or any iterable of pipes
         :return: True or False
         """
-        for pipe in pipes:
-            top_left = bird.coordinates[0]
-            bottom_right = bird.coordinates[-1]
-            # If the top left coordinate of the bird is in the opening of the pipe
-            if (pipe.top > top_left[0] > pipe.bottom) and (
-                    pipe.coordinates[0][1] < top_left[1] < pipe.coordinates[-1][1]):
-                score_engine.increase_score()
-                return True
-            # If the bottom right coordinate of the bird is in the opening of the pipe
-            elif (pipe.top > bottom_right[0] > pipe.bottom) and (
-                    pipe.coordinates[0][1] < bottom_right[1] < pipe.coordinates[-1][1]):
-                score_engine.increase_score()
-                return True
+        y = bird.row
+        corners = ((y, bird.x), (y + bird.height - 1, bird.x + bird.width - 1))
+        for pipe in CollisionEngine.nearby(bird, pipes):
+            for y, x in corners:
+                # If a corner of the bird is in the opening of the pipe
+                if pipe.top <= y < pipe.bottom and pipe.x < x < pipe.x + pipe.width - 1:
+                    score_engine.increase_score()
+                    return True
         return False
 
 
 class Bird:
     """
     Handles flapping and gravity
+
+    The bird is a rectangle. Only its top left corner and size are stored, the coordinates of every character are
+    made when something asks for them
     """
 
+    __slots__ = ('char', 'height', 'width', 'x', 'y', 'vy', 'title', 'name')
+
     def __init__(self, title='Mr.', name='Glappy Glird', char='#'):
         self.char = char
-        # Size + coordinates
+        # Size + coordinates. With Physics, y is a float and is only snapped to a row when the bird is drawn
         self.height = None
         self.width = None
         self.x = None
         self.y = None
-
-        self.border_coordinates = []
-        self.coordinates = []
+        # Only used with Physics. Rows per second, down is positive
+        self.vy = 0.0
 
         # Used for printing when the game ends
         self.title = title
         self.name = name
 
+    @property
+    def row(self):
+        """
+        The row the top of the bird is on. Drawing and collisions both use it, so the bird dies exactly when it is
+        drawn touching something
+        :return: An int
+        """
+        return quantize(self.y)
+
+    @property
+    def coordinates(self):
+        """
+        Every coordinate of the bird
+        :return: A list of (y, x)
+        """
+        y = self.row
+        return [(y_coord, x_coord) for y_coord in range(y, y + self.height)
+                for x_coord in range(self.x, self.x + self.width)]
+
+    @property
+    def border_coordinates(self):
+        """
+        Coordinates of the (right side + top + bottom) of the bird because that is the only part that can touch the
+        pipes
+        :return: A list of (y, x)
+        """
+        y, x, height, width = self.row, self.x, self.height, self.width
+        return [coord for coord in self.coordinates if ((coord[0] >= y and coord[1] == x + width - 1) or (coord[0] == y and coord[1] >= x) or (coord[0] == y + height - 1 and coord[1] >= x))]
+
+    def rects(self):
+        """
+        The rectangles that make up the bird
+        :return: A list of (y, x, height, width)
+        """
+        return [(self.row, self.x, self.height, self.width)]
+
     def build(self, height=4, width=5, y=30, x=10):
         """
         Returns a set of coordinates to build the bird at (y, x)
@@ -164,42 +439,37 @@ class Bird:
         self.width = width
         self.x = x
         self.y = y
-
-        # Creates the coordinates
-        self.coordinates = [(y_coord, x_coord) for y_coord in range(y, y + height) for x_coord in range(x, x + width)]
-        # Coordinates of the (right side + top + bottom) of the bird because that is the only part that can touch the
-        # pipes
-        self.border_coordinates = [coord for coord in self.coordinates if ((coord[0] >= y and coord[1] == x + width - 1) or (coord[0] == y and coord[1] >= x) or (coord[0] == y + height - 1 and coord[1] >= x))]
+        self.vy = 0.0
 
         return self.coordinates
 
     def flap(self, game, amount):
         """
         Flaps the bird
-        :param game: An instance of Game
+        :param game: An instance of Game, or None when running headless
         :param amount: How many pixels the bird should go up when it flaps
-        :return: A list of "birds" to draw on the screen to make the bird appear animated
+        :return: The new y coordinate of the top of the bird
         """
         # Deletes the bird on the screen before redrawing
-        game.long_del(self.coordinates)
-        # Adjusts every coordinate that makes up the bird to move up some amount
-        self.coordinates = list(map(lambda coordinate: (coordinate[0] - amount, coordinate[1]), self.coordinates))
-        self.border_coordinates = list(map(lambda coordinate: (coordinate[0] - amount, coordinate[1]), self.border_coordinates))
-        return self.coordinates
+        if game is not None:
+            game.long_del(self.coordinates)
+        # Moving the top left corner moves the whole bird
+        self.y -= amount
+        return self.y
 
     def fall(self, game, amount):
         """
         Makes the bird fall with gravity
-        :param game: An instance of Game
+        :param game: An instance of Game, or None when running headless
         :param amount: How many pixels the bird should fall down every tick
-        :return: A list of "birds" to draw on the screen to make the bird appear animated
+        :return: The new y coordinate of the top of the bird
         """
         # Deletes the bird on the screen before redrawing
-        game.long_del(self.coordinates)
-        # Adjusts every coordinate that makes up the bird to move up some amount
-        self.coordinates = list(map(lambda coordinate: (coordinate[0] + amount, coordinate[1]), self.coordinates))
-        self.border_coordinates = list(map(lambda coordinate: (coordinate[0] + amount, coordinate[1]), self.border_coordinates))
-        return self.coordinates
+        if game is not None:
+            game.long_del(self.coordinates)
+        # Moving the top left corner moves the whole bird
+        self.y += amount
+        return self.y
 
     def coast(self):
         """
@@ -212,60 +482,103 @@ class Bird:
 class Pipe:
     """
     A blueprint for creating pipes randomly
+
+    A pipe is a column span: its left x, its width and the opening between top and bottom. Moving a pipe only moves
+    its left x, the coordinates of every character are made when something asks for them
     """
 
+    __slots__ = ('char', 'yrange', 'x', 'width', 'top', 'bottom')
+
     def __init__(self, char='&', yrange=None):
         self.char = char
 
         # Boilerplate code for a method call later to build self
         if yrange is None:
-            self.yrange = (0, curses.LINES)
+            self.yrange = (0, screen_size()[0])
         else:
             self.yrange = yrange
-        self.xrange = None
+        self.x = None
+        self.width = None
         self.top = None
         self.bottom = None
 
-        self.border_coordinates = []
-        self.coordinates = []
+    @property
+    def xrange(self):
+        """
+        The range of x values from the left side of the pipe to the right side of the pipe
+        :return: (left, right)
+        """
+        return self.x, self.x + self.width
 
-    def build(self, width, top, bottom, assertion=True):
+    @property
+    def coordinates(self):
+        """
+        Every coordinate of the pipe
+        :return: A list of (y, x)
+        """
+        top, bottom = self.top, self.bottom
+        return [(y, x) for y in range(self.yrange[0], self.yrange[1]) for x in range(self.x, self.x + self.width)
+                if y < top or y >= bottom]
+
+    @property
+    def border_coordinates(self):
+        """
+        Border coordinates is the (left + top opening + bottom opening) coordinates of the pipe
+        :return: A list of (y, x)
         """
-        Creates coordinates for the pipe
+        left, top, bottom = self.x, self.top, self.bottom
+        return [coord for coord in self.coordinates if ((coord[0] >= 0 and coord[1] == left) or (coord[0] == top - 1 and coord[1] >= left) or (coord[0] == bottom + 1 and coord[1] >= left))]
+
+    def rects(self):
+        """
+        The rectangles that make up the pipe. One above the opening and one below it
+        :return: A list of (y, x, height, width)
+        """
+        rects = []
+        if self.top > self.yrange[0]:
+            rects.append((self.yrange[0], self.x, self.top - self.yrange[0], self.width))
+        if self.bottom < self.yrange[1]:
+            rects.append((self.bottom, self.x, self.yrange[1] - self.bottom, self.width))
+        return rects
+
+    def build(self, width, top, bottom, assertion=True, cols=None):
+        """
+        Creates the pipe
         :param width: The range of x values for the left side of the pipe to the right side of the pipe
         :param top: The y value for the top of the opening of the pipe
         :param bottom: The y value for the bottom of the opening of the pipe
         :param assertion: Whether or not this method should assert the values given to it are correct. Unsafe to choose False
-        :return: Coordinates to draw the pipe
+        :param cols: The width of the screen, only used by the assertions. Defaults to curses.COLS
+        :return: self. Use self.coordinates or self.rects() to draw the pipe
         """
         left = width[0]  # Readability
         right = width[1]  # Readability
         if assertion:
+            if cols is None:
+                cols = screen_size()[1]
+            lines = self.yrange[1]
             # Sanity check for the parameters
             assert (left > -1), "The minimum x coordinate of the screen is 0 and you gave {}".format(left)
-            assert (right <= curses.COLS - 1), "The maximum x coordinate of the screen is {} and you gave {}".format(
-                curses.COLS - 1, right)
+            assert (right <= cols - 1), "The maximum x coordinate of the screen is {} and you gave {}".format(
+                cols - 1, right)
             assert (top >= 0), "The minimum y coordinate of the screen is 0 and you gave {} for the top of the " \
                                "opening of the pipe".format(top)
-            assert (bottom <= curses.LINES), "The maximum y coordinate of the screen is {} and you gave {} for the " \
-                                             "bottom of the opening of the pipe".format(curses.LINES, bottom)
+            assert (bottom <= lines), "The maximum y coordinate of the screen is {} and you gave {} for the " \
+                                      "bottom of the opening of the pipe".format(lines, bottom)
             assert (top < bottom), "Overlapping ends of the opening of the pipe. Top: {}, Bottom: {}\nRemember, " \
                                    "the x axis in curses starts at the top of the screen and the y coordinate " \
                                    "increments " \
                                    "by 1 as it goes down".format(top, bottom)
         self.top = top
         self.bottom = bottom
-        self.xrange = width
+        self.x = left
+        self.width = right - left
 
-        self.coordinates = [(y, x) for y in range(self.yrange[0], self.yrange[1]) for x in
-                            range(self.xrange[0], self.xrange[1]) if y < top or y >= bottom]
-        # Border coordinates is the (left + top opening + bottom opening) coordinates of the pipe
-        self.border_coordinates = [coord for coord in self.coordinates if ((coord[0] >= 0 and coord[1] == left) or (coord[0] == top - 1 and coord[1] >= left) or (coord[0] == bottom + 1 and coord[1] >= left))]
-        return self.coordinates
+        return self
 
     def delete(self, *x):
         """
-        Deletes a column of characters from self.coordinates
+        Deletes columns of characters from the left of the pipe
         :param x: A range of x coordinates of the columns of the pipe to delete
         :return: The new self.coordinates
         """
@@ -278,51 +591,296 @@ class Pipe:
                           " to be 0 "
         assert increasing(x, 1), "The range of x coordinates of columns to delete from the pipe needs to increase by 1"
 
-        # Converts x to a list so we can change the values
-        x = list(x)
-        # Changes the range of coordinates to fit the x coordinates of the columns
-        x = [x_coord for x_coord in range(self.coordinates[0][1], self.coordinates[0][1] + len(x))]
-
-        # Loops over all of the coordinates and checks if they are in the range of x coordinates given
-        self.coordinates = [coordinate for coordinate in self.coordinates if coordinate[1] not in x]
+        # Deleting columns from the left is the same as moving the left side of the pipe right
+        columns = min(len(x), self.width)
+        self.x += columns
+        self.width -= columns
         return self.coordinates
 
     def move(self, game, amount):
         """
         Moves the pipe backwards some amount
-        :param game: An instance of the Game class
+        :param game: An instance of the Game class, or None when running headless
         :param amount: The amount to move forward or backwards
-        :return: The new coordinates
+        :return: The new left x of the pipe
         """
         # Deletes the pipe on the screen before redrawing. If parts of the pipe are off the screen, it is ignored
-        game.long_add(" ", self.coordinates, exception=lambda: nothing())
+        if game is not None:
+            game.long_add(" ", self.coordinates, exception=lambda: nothing())
 
-        # Adjusts every coordinate that makes up the bird to move up some amount
-        self.coordinates = list(map(lambda coordinate: (coordinate[0], coordinate[1] - amount), self.coordinates))
-        self.border_coordinates = list(map(lambda coordinate: (coordinate[0], coordinate[1] - amount), self.border_coordinates))
-        return self.coordinates
+        # Moving the left side moves the whole pipe
+        self.x -= amount
+        return self.x
+
+
+class PipePool:
+    """
+    Keeps pipes that scrolled off of the screen so new pipes can reuse them instead of being created. Long games then
+    stop creating and throwing away objects, which keeps the garbage collector from pausing the game
+    """
+
+    __slots__ = ('free', 'size')
+
+    def __init__(self, size=32):
+        """
+        :param size: The most pipes to keep
+        """
+        self.free = []
+        self.size = size
+
+    def acquire(self, char='&', yrange=None):
+        """
+        Gets a pipe, reusing a released one if there is one. It still needs to be built
+        :param char: The character of the pipe
+        :param yrange: The range of y values of the pipe
+        :return: An instance of Pipe
+        """
+        if self.free:
+            pipe = self.free.pop()
+            pipe.char = char
+            pipe.yrange = (0, screen_size()[0]) if yrange is None else yrange
+            return pipe
+        return Pipe(char, yrange)
+
+    def release(self, pipe):
+        """
+        Gives back a pipe that is not used any more
+        :param pipe: An instance of Pipe
+        :return: None
+        """
+        if len(self.free) < self.size:
+            self.free.append(pipe)
 
 
-class Game:
+class World:
+    """
+    The whole game without the terminal. Holds the bird, the pipes and the score and moves them forward one tick at a
+    time. Nothing in here touches curses, so thousands of worlds can be stepped without a screen
+    """
+
+    def __init__(self, height, width, bird=None, pipe_char='&', pipe_speed=3, flap_amount=3, fall_amount=2,
+                 seed=None, curve=None, lookahead=16, physics=None):
+        assert height > 0 and width > 0, "The world needs a positive height and width, got {}x{}".format(height, width)
+        self.height = height
+        self.width = width
+
+        # Holds the "sprites" in the world
+        self.bird = Bird(char='#') if bird is None else bird
+        self.pipes = PipeIndex()
+        # Pipes that scrolled off of the screen, kept to be used again
+        self.pool = PipePool()
+        self.yrange = (0, height)
+
+        # How far things move every tick
+        self.pipe_char = pipe_char
+        self.pipe_speed = pipe_speed
+        self.flap_amount = flap_amount
+        self.fall_amount = fall_amount
+        # An instance of Physics, or None for the integer flap and fall
+        self.physics = physics
+
+        # This is for the world tick system
+        self.tick_value = 0
+        self.ticks = 0
+        # How many columns the world has scrolled. Planned pipes are placed by distance, not by screen x
+        self.distance = 0
+        # Picks the openings of new pipes. The same seed always makes the same pipes
+        self.seed = seed
+        self.random = random.Random(seed)
+        # Plans the pipes ahead of time. Made by start, since it needs the size of the bird and the pipes
+        self.curve = curve
+        self.lookahead = lookahead
+        self.generator = None
+        # What start was called with
+        self.layout = {}
+
+        # The score is incremented every time the bird gets past a pipe
+        self.ScoreEngine = ScoreEngine(increment=1)
+        self.scorer = PipeScorer(self.ScoreEngine)
+        # What the bird hit, once it hit something
+        self.collision = None
+        # Times every stage of a tick. Does nothing unless it is replaced with a Profiler
+        self.profiler = NullProfiler()
+
+    def start(self, bird_height=3, bird_width=5, bird_y=10, bird_x=10, pipe_width=10, top=None, bottom=None):
+        """
+        Builds the bird and the first pipe
+        :param bird_height: The height of the bird
+        :param bird_width: The width of the bird
+        :param bird_y: The y coordinate of the top left of the bird
+        :param bird_x: The x coordinate of the top left of the bird
+        :param pipe_width: The width of the first pipe. The pipe starts in the middle of the world
+        :param top: The y value for the top of the opening of the first pipe. Defaults to a little above the middle
+        :param bottom: The y value for the bottom of the opening of the first pipe. Defaults to a little below the middle
+        :return: self
+        """
+        top = self.height // 2 - 5 if top is None else top
+        bottom = self.height // 2 + 5 if bottom is None else bottom
+        # Kept so the same start can be made again, for example by a replay
+        self.layout = dict(bird_height=bird_height, bird_width=bird_width, bird_y=bird_y, bird_x=bird_x,
+                           pipe_width=pipe_width, top=top, bottom=bottom)
+
+        self.bird.build(height=bird_height, width=bird_width, y=bird_y, x=bird_x)
+        pipe = self.pool.acquire(self.pipe_char, self.yrange)
+        pipe.build(width=(self.width // 2, self.width // 2 + pipe_width), top=top, bottom=bottom, cols=self.width)
+        self.add_pipe(pipe)
+
+        if self.physics is None:
+            flap_amount, fall_amount, swing = self.flap_amount, self.fall_amount, None
+        else:
+            flap_amount, fall_amount, swing = self.physics.amounts()
+        self.generator = PipeGenerator(self.height, self.random, curve=self.curve, lookahead=self.lookahead,
+                                       pipe_width=pipe_width, bird_height=bird_height, pipe_speed=self.pipe_speed,
+                                       flap_amount=flap_amount, fall_amount=fall_amount, swing=swing)
+        self.generator.reset(PipeSpec(pipe.x + self.distance, top, bottom, pipe.width))
+        return self
+
+    def add_pipe(self, pipe):
+        """
+        Adds a pipe to self.pipes
+        :param pipe: An instance of the Pipe class
+        :return: None
+        """
+        assert isinstance(pipe, Pipe)
+        self.pipes.add(pipe)
+
+    def step(self, flap=False):
+        """
+        Moves the world forward by one tick. If the bird does not flap, it starts to fall down
+        :param flap: Whether the bird flaps this tick
+        :return: An instance of Collision saying what the bird hit, or None if it is still alive
+        """
+        phase = self.profiler.phase
+
+        with phase('pipes'):
+            pipes = self.pipes
+            speed = self.pipe_speed
+            for pipe in pipes:
+                # Move the pipe backwards
+                pipe.move(None, speed)
+            self.distance += speed
+
+            # The pipes are sorted by x, so the pipes that are completely off of the screen are at the front. They
+            # are given back to the pool to be used again
+            while pipes and pipes[0].x + pipes[0].width <= 0:
+                self.pool.release(pipes.pop_left())
+
+        # Acts off of the input
+        with phase('input'):
+            if self.physics is not None:
+                self.bird.y, self.bird.vy = self.physics.step(self.bird.y, self.bird.vy, flap)
+            elif flap:
+                self.bird.flap(None, self.flap_amount)
+                # Set tick value to 0 so bird does not coast fall coast fall etc...
+                self.tick_value = 0
+            else:
+                # Wait one tick before falling
+                if self.tick_value == 0:
+                    self.bird.coast()
+                    # Don't want the bird to coast forever
+                    self.tick_value += 1
+                else:
+                    self.bird.fall(None, self.fall_amount)
+                    self.tick_value += 1
+
+        # Builds the planned pipes that scrolled into view
+        with phase('generate'):
+            generator = self.generator
+            if generator is not None:
+                while generator.peek().x - self.distance < self.width:
+                    self.generate_pipe()
+
+        # Checks for collision before the bird's position is drawn
+        with phase('border_collision'):
+            self.collision = CollisionEngine.border_collision(None, self.bird, lines=self.height, exit=False)
+        if self.collision is None:
+            with phase('pipe_collision'):
+                self.collision = CollisionEngine.pipe_collision(None, self.bird, self.pipes, exit=False)
+        if self.collision is None:
+            with phase('score'):
+                self.scorer.update(self.bird, self.pipes, self.ticks)
+
+        self.ticks += 1
+        return self.collision
+
+    def generate_pipe(self):
+        """
+        Builds the next planned pipe, wherever it is on the screen
+        :return: The new pipe
+        """
+        spec = self.generator.pop(self.ScoreEngine.score())
+        left = spec.x - self.distance
+        new_pipe = self.pool.acquire(self.pipe_char, self.yrange)
+        new_pipe.build(width=(left, left + spec.width), top=spec.top, bottom=spec.bottom, assertion=False)
+        self.add_pipe(new_pipe)
+        return new_pipe
+
+    def shapes(self):
+        """
+        Everything that should be drawn, as (char, rectangles) pairs
+        :return: A list of (char, [(y, x, height, width), ...])
+        """
+        return [(pipe.char, pipe.rects()) for pipe in self.pipes] + [(self.bird.char, self.bird.rects())]
+
+
+class Game(Renderer):
     """
     A class for drawing with python curses
     """
 
-    def __init__(self, bird=Bird(char='#'), sleep=0.1):
-        # Holds the "sprites" currently on the screen
-        self.pipes = []
+    def __init__(self, bird=Bird(char='#'), sleep=0.1, fps=30, profiler=None, hud=False, seed=None, record=None,
+                 physics=None, colour=False, autopilot=None):
         self.bird = bird
+        # An instance of Physics for the world, or None for the integer flap and fall
+        self.physics = physics
+        # Created once curses knows how big the screen is
+        self.world = None
+        self.stdscr = None
 
         # This is for the world tick system
         assert (type(sleep) in [int, float]), "The value of sleep must be an integer or a float"
         assert (sleep >= 0), "The integer value of sleep must be greater than 0"
-        self.tick_value = 0
-        self.gen_pipe_tick = 0
         self.sleep = sleep
-
-        # This score will be printed at the end. It is incremented every time the snake eats a piece of food
-        self.ScoreEngine = ScoreEngine(increment=1)
+        # How many frames are drawn every second by run. None draws as fast as possible
+        self.fps = fps
+        # The fixed timestep loop used by run. It holds the measured tick and frame times
+        self.scheduler = None
+        # The asyncio loop used by run_async
+        self.runtime = None
+
+        # Draws the world, writing only what changed since the last frame
+        self.renderer = None
         self.frozen = False
+        # Whether to draw the bird and the pipes in colour, if the terminal has colours
+        self.colour = colour
+        # A policy that flies the bird, like agent.QAgent: called with the World every tick, returns True to flap
+        self.autopilot = autopilot
+        # Set when the terminal changes size. The next draw fits the screen to the new size
+        self.resized = False
+        self.previous_sigwinch = None
+
+        # Times every stage of a tick. hud draws the timings over the game, so it needs a real Profiler
+        if profiler is None:
+            profiler = Profiler() if hud else NullProfiler()
+        self.profiler = profiler
+        self.overlay = TimingOverlay(self.profiler) if hud else None
+
+        # Shown in the top left corner. Only changed when the score goes up
+        self.score_text = 'Score: 0'
+
+        # The seed for the pipes. Every game has one so it can be recorded and replayed
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        # Where to save a recording of the game when it ends, if anywhere
+        self.record = record
+        self.recorder = None
+
+    @property
+    def pipes(self):
+        return self.world.pipes
+
+    @property
+    def ScoreEngine(self):
+        return self.world.ScoreEngine
 
     def __enter__(self):
         """
@@ -330,8 +888,10 @@ class Game:
         The curses application "prints" to the terminal
         :return: None
         """
+        import curses
+
         # Initializes the curses application
-        self.stdscr = curses.initscr()
+        stdscr = curses.initscr()
 
         # This hides the cursor
         curses.curs_set(False)
@@ -344,11 +904,18 @@ class Game:
         curses.nocbreak()
 
         # This function call allows the user to enter keys without the program freezing
-        self.stdscr.nodelay(True)
+        stdscr.nodelay(True)
 
         # So the terminal does not return multibyte escape sequences
         # Instead, curses returns something like curses.KEY_LEFT
-        self.stdscr.keypad(True)
+        stdscr.keypad(True)
+
+        self.attach(stdscr, curses.LINES, curses.COLS, palette=self.palette() if self.colour else None)
+
+        # curses normally turns a resize into KEY_RESIZE, but not every build does, so SIGWINCH is watched too
+        import signal
+        if hasattr(signal, 'SIGWINCH'):
+            self.previous_sigwinch = signal.signal(signal.SIGWINCH, self.on_resize)
 
         # In the use of a context manager, self must be returned
         # So the as keyword can pass along game to the given variable
@@ -359,70 +926,207 @@ class Game:
         Terminates the curses application and returns control to the terminal
         :return: None
         """
+        import curses
+        import signal
         curses.flash()
         curses.nocbreak()
         self.stdscr.keypad(False)
         curses.echo()
         curses.endwin()
+        if self.previous_sigwinch is not None:
+            signal.signal(signal.SIGWINCH, self.previous_sigwinch)
+            self.previous_sigwinch = None
 
-    def tick(self):
+        if self.recorder is not None:
+            self.recorder.save(self.record)
+
+    def palette(self):
         """
-        Performs a tick. If the up arrow is not pressed, the bird starts to fall down
+        Sets up the colours of the bird and the pipes
+        :return: A dict of char -> curses attribute, or None if the terminal has no colours
+        """
+        import curses
+        if not curses.has_colors():
+            return None
+        curses.start_color()
+        curses.use_default_colors()
+        curses.init_pair(1, curses.COLOR_YELLOW, -1)
+        curses.init_pair(2, curses.COLOR_GREEN, -1)
+        return {self.bird.char: curses.color_pair(1) | curses.A_BOLD, '&': curses.color_pair(2)}
+
+    def attach(self, stdscr, lines, cols, palette=None):
+        """
+        Attaches a screen and creates the world to fit it
+        :param stdscr: The curses window to draw on
+        :param lines: The height of the screen
+        :param cols: The width of the screen
+        :param palette: A dict of char -> curses attribute to draw in colour, or None
         :return: None
         """
-        for pipe in self.pipes[:]:
-            # Move the pipe backwards
-            pipe.move(self, 3)
-
-            # Draw the new pipe. If there is a curses error, ignore it
-            self.long_add(pipe.char, pipe.coordinates, exception=lambda: [nothing()])
-
-            # If the pipe is completely off of the screen, delete the pipe
-            if pipe.coordinates[-1][1] < 0:
-                self.pipes.remove(pipe)
-                del pipe
-                continue
-
-        # Acts off of user input
-        inp = self.getch()
-        if inp == 119 or inp == curses.KEY_UP:  # 119 = W key
-            self.bird.flap(self, 3)
-            # Reset tick value to 0 so bird does not coast fall coast fall etc...
-            self.tick_value = 0
-        else:
-            # Wait one tick before falling
-            if self.tick_value == 0:
-                self.bird.coast()
-                # Don't want the bird to coast forever
-                self.tick_value += 1
-            else:
-                self.bird.fall(self, 2)
-                self.tick_value += 1
-
-        # Checks if it is time to generate a pipe
-        if self.gen_pipe_tick >= 10:
-            new_pipe = Pipe('&')
-            random_top = random.randint((curses.LINES // 4) - 7, (curses.LINES // 4) + 7)
-            random_bottom = random.randint(((curses.LINES // 4) * 3) - 7, ((curses.LINES // 4) * 3) + 7)
-            new_pipe.build(width=(self.pipes[-1].xrange[0] + 10, self.pipes[-1].xrange[1] + 10), top=random_top,
-                           bottom=random_bottom, assertion=False)
-            self.add_pipe(new_pipe)
-            self.long_add(new_pipe.char, new_pipe.coordinates, exception=lambda: [nothing()])
-            self.gen_pipe_tick = 0
-        else:
-            self.gen_pipe_tick += 1
+        self.stdscr = stdscr
+        self.world = World(lines, cols, bird=self.bird, seed=self.seed, physics=self.physics)
+        self.world.profiler = self.profiler
+        self.world.ScoreEngine.subscribe(self.on_score)
+        self.renderer = DiffRenderer(stdscr, lines, cols, palette=palette)
 
-        # Checks for collision before updating the coordinates of the bird on the screen
-        CollisionEngine.border_collision(self.ScoreEngine, self.bird)
-        CollisionEngine.pipe_collision(self.ScoreEngine, self.bird, self.pipes)
-        CollisionEngine.between_pipe(self.ScoreEngine, self.bird, self.pipes)
+    def step(self, keys):
+        """
+        Moves the world forward one tick using the keys pressed since the last tick
+        :param keys: A list of keys, like the ones returned by getch
+        :return: False if the escape key (ASCII 27) was pressed, else True
+        """
+        import curses
 
-        # If the game did not end because of a collision, the bird's position is updated
-        self.long_add(self.bird.char, self.bird.coordinates)
+        if 27 in keys:
+            return False
+        if curses.KEY_RESIZE in keys:
+            self.resized = True
+
+        # Acts off of user input. 119 = W key
+        flap = 119 in keys or curses.KEY_UP in keys
+        if not flap and self.autopilot is not None:
+            flap = bool(self.autopilot(self.world))
+        if self.record is not None:
+            if self.recorder is None:
+                # replay imports this module, so it is imported here
+                from replay import Recorder
+                self.recorder = Recorder(self.world)
+            self.recorder.record(flap)
+        collision = self.world.step(flap=flap)
+
+        # If the game ended because of a collision, say why
+        if collision is not None:
+            CollisionEngine.game_over(collision, self.world.ScoreEngine, self.bird, lines=self.world.height)
+        return True
+
+    def tick(self):
+        """
+        Performs a tick and draws it. If the up arrow is not pressed, the bird starts to fall down
+        :return: False if the escape key was pressed, else True
+        """
+        start = time.perf_counter()
+        playing = self.step(self.drain_input())
+
+        # If the game did not end because of a collision, the new positions are drawn
+        self.draw(self.world)
         self.refresh()
-        time.sleep(self.sleep)
 
-        self.gen_pipe_tick += 1
+        # Only sleep for what is left of the tick
+        remaining = self.sleep - (time.perf_counter() - start)
+        if remaining > 0:
+            time.sleep(remaining)
+        return playing
+
+    def run(self):
+        """
+        Plays until the escape key is pressed. The world is stepped every self.sleep seconds and drawn self.fps times
+        a second
+        :return: None
+        """
+        def render():
+            self.draw(self.world)
+            self.refresh()
+
+        self.scheduler = Scheduler(self.step, render, self.getch, self.sleep, fps=self.fps)
+        self.scheduler.run()
+
+    def run_async(self, poll_interval=0.005):
+        """
+        Plays until the escape key is pressed, like run, but reads keys, steps the world and draws in separate asyncio
+        tasks. Keys are read every poll_interval seconds and a slow draw does not hold up the world
+        :param poll_interval: How many seconds between reads of the keyboard
+        :return: None
+        """
+        def render(snapshot):
+            self.draw_snapshot(snapshot)
+            self.refresh()
+
+        # asyncio is slow to import, so it is only loaded when it is used
+        from async_runtime import AsyncRuntime
+        self.runtime = AsyncRuntime(self.step, self.snapshot, render, self.getch, self.sleep,
+                                    poll_interval=poll_interval, fps=self.fps)
+        self.runtime.run()
+
+    def snapshot(self):
+        """
+        Copies what needs to be drawn, so it can be drawn while the world keeps moving
+        :return: (shapes, score text)
+        """
+        return self.world.shapes(), self.score_text
+
+    def draw(self, world):
+        """
+        Draws the world. Only the characters that changed since the last frame are written to the screen
+        :param world: An instance of the World class
+        :return: None
+        """
+        self.draw_snapshot((world.shapes(), self.score_text))
+
+    def draw_snapshot(self, snapshot):
+        """
+        Draws a snapshot made by self.snapshot
+        :param snapshot: (shapes, score text)
+        :return: None
+        """
+        shapes, score_text = snapshot
+        # Resized here rather than where the resize was noticed, so it happens on the thread that draws
+        if self.resized:
+            self.resize()
+        with self.profiler.phase('draw'):
+            self.renderer.draw_shapes(shapes)
+            self.renderer.overlay(0, 0, score_text)
+            if self.overlay is not None:
+                self.overlay.draw(self.renderer, self.renderer.width)
+
+    def on_resize(self, signum=None, frame=None):
+        """
+        Notes that the terminal changed size. Used as the SIGWINCH handler
+        :return: None
+        """
+        self.resized = True
+
+    def resize(self):
+        """
+        Asks the terminal for its new size and fits the screen to it
+        :return: None
+        """
+        import curses
+        self.resized = False
+        try:
+            size = os.get_terminal_size(sys.__stdout__.fileno())
+            if curses.is_term_resized(size.lines, size.columns):
+                curses.resizeterm(size.lines, size.columns)
+        except (OSError, ValueError, AttributeError):
+            pass
+        curses.update_lines_cols()
+        lines, cols = self.stdscr.getmaxyx()
+        self.fit(lines, cols)
+
+    def fit(self, lines, cols):
+        """
+        Draws the world scaled to a screen of a new size. The world itself keeps its size, so the game carries on
+        exactly as it was
+        :param lines: The height of the screen
+        :param cols: The width of the screen
+        :return: None
+        """
+        viewport = Viewport(self.world.height, self.world.width, lines, cols)
+        self.renderer.resize(lines, cols, None if viewport.identity else viewport)
+
+    def on_score(self, event):
+        """
+        Updates the score shown on the screen
+        :param event: An instance of ScoreEvent
+        :return: None
+        """
+        self.score_text = 'Score: {}'.format(event.score)
+
+    def drain_input(self):
+        """
+        Reads every key pressed since the last time input was read
+        :return: A list of keys
+        """
+        return drain(self.getch)
 
     def getch(self):
         """
@@ -440,12 +1144,11 @@ class Game:
 
     def add_pipe(self, pipe):
         """
-        Adds a pipe to self.pipes
+        Adds a pipe to the world
         :param pipe: An instance of the Pipe class
         :return: None
         """
-        assert isinstance(pipe, Pipe)
-        self.pipes.append(pipe)
+        self.world.add_pipe(pipe)
 
     def add(self, char, y, x, exception=lambda: [print("The curses library cannot draw coordinates that are off of "
                                                        "the screen!"), sys.exit()]):
@@ -0,0 +1,123 @@
+#
+# Plays many headless games at once in a pool of processes
+# A policy takes the place of the keyboard: it is called with the World every tick and returns True to flap
+#
+
+import collections
+import json
+import multiprocessing
+import os
+
+from logic import World
+
+# How one game went. cause is 'top', 'bottom' or 'pipe', or None if the bird was still alive when the ticks ran out
+Result = collections.namedtuple('Result', ['policy', 'seed', 'score', 'ticks', 'cause'])
+
+
+def never(world):
+    """
+    A policy that never flaps
+    """
+    return False
+
+
+def hover(world):
+    """
+    A policy that flaps whenever the bird is below the middle of the opening of the next pipe
+    """
+    bird = world.bird
+    # The first pipe the bird has not gone past yet, found the same way as agent.QAgent finds it
+    pipe = world.pipes.first_right_of(bird.x)
+    target = world.height // 2 if pipe is None else (pipe.top + pipe.bottom) // 2
+    return bird.y + bird.height // 2 > target
+
+
+def play(policy, seed, ticks, height=50, width=120):
+    """
+    Plays one headless game
+    :param policy: A function taking the World and returning True to flap
+    :param seed: The seed for the pipes
+    :param ticks: The most ticks to play
+    :param height: The height of the world
+    :param width: The width of the world
+    :return: (score, ticks survived, cause of death)
+    """
+    world = World(height, width, seed=seed).start()
+    step = world.step
+    collision = None
+    for _ in range(ticks):
+        collision = step(policy(world))
+        if collision is not None:
+            break
+    return world.ScoreEngine.score(), world.ticks, None if collision is None else collision.kind
+
+
+def _play(job):
+    """
+    Runs one job in a worker process
+    :param job: (policy name, policy, seed, ticks, height, width)
+    :return: An instance of Result
+    """
+    name, policy, seed, ticks, height, width = job
+    return Result(name, seed, *play(policy, seed, ticks, height, width))
+
+
+def load_checkpoint(path):
+    """
+    Reads the results saved by an earlier sweep
+    :param path: The checkpoint file
+    :return: A list of Result
+    """
+    if path is None or not os.path.exists(path):
+        return []
+    results = []
+    with open(path) as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                try:
+                    results.append(Result(**json.loads(line)))
+                except ValueError:
+                    # The last line can be cut off if the sweep was killed while writing it
+                    pass
+    return results
+
+
+def evaluate(policies, seeds, ticks, processes=None, checkpoint=None, height=50, width=120, chunksize=1):
+    """
+    Plays every policy on every seed in a pool of processes. Results are yielded as soon as each game finishes, in
+    whatever order they finish in
+
+    If a checkpoint file is given, every result is appended to it as it comes in and games that are already in it are
+    skipped, so an interrupted sweep can be resumed by running it again with the same checkpoint
+
+    :param policies: A dict of name -> policy, or a single policy. Policies are sent to other processes, so they need
+    to be picklable: functions defined at the top level of a module, or instances of such classes
+    :param seeds: An iterable of seeds
+    :param ticks: The most ticks to play in every game
+    :param processes: How many processes to use. Defaults to the number of cores
+    :param checkpoint: A file to save results to and resume from
+    :param height: The height of every world
+    :param width: The width of every world
+    :param chunksize: How many games to send to a process at once. Larger is faster for very short games
+    :return: A generator of Result
+    """
+    if not isinstance(policies, dict):
+        policies = {getattr(policies, '__name__', 'policy'): policies}
+    done = set((result.policy, result.seed) for result in load_checkpoint(checkpoint))
+    jobs = [(name, policy, seed, ticks, height, width) for name, policy in policies.items() for seed in seeds
+            if (name, seed) not in done]
+    if not jobs:
+        return
+
+    output = open(checkpoint, 'a') if checkpoint is not None else None
+    try:
+        with multiprocessing.Pool(processes) as pool:
+            for result in pool.imap_unordered(_play, jobs, chunksize):
+                if output is not None:
+                    output.write(json.dumps(result._asdict()) + '\n')
+                    output.flush()
+                yield result
+    finally:
+        if output is not None:
+            output.close()
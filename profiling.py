@@ -0,0 +1,220 @@
+#
+# Timers for the stages of a tick
+# Every stage is timed under a name and the last few thousand timings are kept so percentiles can be reported
+#
+
+import collections
+import time
+
+
+class Phase:
+    """
+    Times one stage of a tick. Used as a context manager
+    """
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class NullPhase:
+    """
+    A phase that times nothing. Used when profiling is turned off so the tick does not pay for it
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        pass
+
+
+class NullProfiler:
+    """
+    A profiler that records nothing
+    """
+
+    null_phase = NullPhase()
+
+    def phase(self, name):
+        return self.null_phase
+
+    def record(self, name, seconds):
+        pass
+
+
+class Profiler:
+    """
+    Records how long each named stage of a tick takes
+
+    Hooks are called with (name, seconds) every time a stage finishes, so timings can be streamed somewhere else
+    """
+
+    # The percentiles that get reported
+    percentiles = (50, 95, 99)
+
+    def __init__(self, samples=10000):
+        """
+        :param samples: How many timings to keep for every stage. Older timings are thrown away
+        """
+        assert samples > 0, "The profiler needs to keep at least one sample"
+        self.samples = samples
+        self.timings = collections.OrderedDict()
+        self.hooks = []
+        # One Phase per name, so timing a stage does not create a new object every tick
+        self._phases = {}
+
+    def phase(self, name):
+        """
+        Times a stage
+        :param name: The name of the stage
+        :return: A context manager that records how long its body took
+        """
+        phase = self._phases.get(name)
+        if phase is None:
+            phase = self._phases[name] = Phase(self, name)
+        return phase
+
+    def record(self, name, seconds):
+        """
+        Records how long a stage took
+        :param name: The name of the stage
+        :param seconds: How long it took
+        :return: None
+        """
+        timings = self.timings.get(name)
+        if timings is None:
+            timings = self.timings[name] = collections.deque(maxlen=self.samples)
+        timings.append(seconds)
+        for hook in self.hooks:
+            hook(name, seconds)
+
+    def add_hook(self, hook):
+        """
+        Adds a function to call every time a stage finishes
+        :param hook: A function taking (name, seconds)
+        :return: None
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """
+        Removes a function added with add_hook
+        :param hook: The function
+        :return: None
+        """
+        self.hooks.remove(hook)
+
+    def reset(self):
+        """
+        Throws away every timing
+        :return: None
+        """
+        self.timings.clear()
+
+    @staticmethod
+    def percentile(values, percent):
+        """
+        Finds a percentile with the nearest rank method
+        :param values: A sorted list of numbers
+        :param percent: The percentile, from 0 to 100
+        :return: The value at that percentile
+        """
+        if not values:
+            return 0
+        rank = max(int(round(percent / 100 * len(values) + 0.5)) - 1, 0)
+        return values[min(rank, len(values) - 1)]
+
+    def stats(self):
+        """
+        Sums up the timings of every stage
+        :return: An ordered dict of name -> {'count', 'mean', 'p50', 'p95', 'p99', 'max'} in seconds
+        """
+        stats = collections.OrderedDict()
+        for name, timings in self.timings.items():
+            values = sorted(timings)
+            summary = collections.OrderedDict()
+            summary['count'] = len(values)
+            summary['mean'] = sum(values) / len(values) if values else 0
+            for percent in self.percentiles:
+                summary['p{}'.format(percent)] = self.percentile(values, percent)
+            summary['max'] = values[-1] if values else 0
+            stats[name] = summary
+        return stats
+
+    def export_json(self, path):
+        """
+        Writes the stats to a JSON file
+        :param path: Where to write the file
+        :return: The stats that were written
+        """
+        import json
+        stats = self.stats()
+        with open(path, 'w') as file:
+            json.dump(stats, file, indent=2)
+        return stats
+
+    def export_csv(self, path):
+        """
+        Writes the stats to a CSV file with one row per stage
+        :param path: Where to write the file
+        :return: The stats that were written
+        """
+        import csv
+        stats = self.stats()
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            columns = ['count', 'mean'] + ['p{}'.format(percent) for percent in self.percentiles] + ['max']
+            writer.writerow(['phase'] + columns)
+            for name, summary in stats.items():
+                writer.writerow([name] + [summary[column] for column in columns])
+        return stats
+
+
+class TimingOverlay:
+    """
+    Draws the p50 / p95 / p99 of every stage over the top right corner of the game
+    """
+
+    def __init__(self, profiler, every=10):
+        """
+        :param profiler: An instance of Profiler
+        :param every: How many frames to wait between working out the percentiles again
+        """
+        self.profiler = profiler
+        self.every = every
+        self.frames = 0
+        self.lines = []
+
+    def text(self):
+        """
+        The lines of the overlay
+        :return: A list of strings
+        """
+        lines = ['{:<16} {:>8} {:>8} {:>8}'.format('phase (ms)', 'p50', 'p95', 'p99')]
+        for name, summary in self.profiler.stats().items():
+            lines.append('{:<16} {:>8.3f} {:>8.3f} {:>8.3f}'.format(
+                name, summary['p50'] * 1000, summary['p95'] * 1000, summary['p99'] * 1000))
+        return lines
+
+    def draw(self, renderer, width):
+        """
+        Draws the overlay
+        :param renderer: An instance of DiffRenderer
+        :param width: The width of the screen
+        :return: None
+        """
+        # Sorting every timing is too slow to do every frame
+        if self.frames % self.every == 0:
+            self.lines = self.text()
+        self.frames += 1
+        for y, line in enumerate(self.lines):
+            renderer.overlay(y, max(width - len(line) - 1, 0), line)
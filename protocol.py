@@ -0,0 +1,63 @@
+#
+# The messages sent between server.py and its clients
+#
+# A client starts by sending HELLO with the size of its screen. After that every message it sends is one byte: FLAP,
+# RESTART or QUIT.
+# The server sends one frame per tick: a FRAME header followed by the runs that changed, each a RUN header followed by
+# the text of the run in UTF-8. The runs come from FrameBuffer.diff, so a frame where nothing moved is only a header
+#
+
+import struct
+
+# height, width
+HELLO = struct.Struct('<HH')
+# kind, cause, tick, score, inputs, number of runs
+FRAME = struct.Struct('<BBIIIH')
+# y, x, length of the text in bytes
+RUN = struct.Struct('<HHH')
+
+# What a client can send
+FLAP = 1
+RESTART = 2
+QUIT = 3
+
+# The kinds of frame. OVER is sent once when the bird hits something
+PLAYING = 0
+OVER = 1
+
+# Why the bird died, sent in the cause field of a frame
+CAUSES = {None: 0, 'top': 1, 'bottom': 2, 'pipe': 3}
+CAUSE_NAMES = {code: name for name, code in CAUSES.items()}
+
+
+def encode_frame(kind, cause, tick, score, inputs, runs):
+    """
+    Packs one frame
+    :param kind: PLAYING or OVER
+    :param cause: What the bird hit, 'top', 'bottom', 'pipe' or None
+    :param tick: The tick of the world
+    :param score: The score
+    :param inputs: How many bytes from the client the server has acted on so far. Lets a client time its inputs
+    :param runs: A list of (y, x, text), like FrameBuffer.diff returns
+    :return: bytes
+    """
+    parts = [FRAME.pack(kind, CAUSES[cause], tick, score, inputs, len(runs))]
+    for y, x, text in runs:
+        data = text.encode()
+        parts.append(RUN.pack(y, x, len(data)))
+        parts.append(data)
+    return b''.join(parts)
+
+
+async def read_frame(reader):
+    """
+    Reads one frame from a stream
+    :param reader: An asyncio.StreamReader
+    :return: (kind, cause, tick, score, inputs, runs) where runs is a list of (y, x, text)
+    """
+    kind, cause, tick, score, inputs, count = FRAME.unpack(await reader.readexactly(FRAME.size))
+    runs = []
+    for _ in range(count):
+        y, x, length = RUN.unpack(await reader.readexactly(RUN.size))
+        runs.append((y, x, (await reader.readexactly(length)).decode()))
+    return kind, CAUSE_NAMES[cause], tick, score, inputs, runs
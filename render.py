@@ -0,0 +1,368 @@
+#
+# Renderers draw a World. The World itself never touches curses, so the same simulation can be drawn to a terminal,
+# drawn somewhere else, or not drawn at all
+#
+
+from sprites import SpriteCache
+
+
+class Renderer:
+    """
+    The interface every renderer implements. Game plugs into this to draw the World with curses
+    """
+
+    def draw(self, world):
+        """
+        Draws the current state of a world
+        :param world: An instance of the World class
+        :return: None
+        """
+        raise NotImplementedError
+
+    def refresh(self):
+        """
+        Pushes whatever was drawn to the output
+        :return: None
+        """
+        pass
+
+
+class NullRenderer(Renderer):
+    """
+    A renderer that draws nothing. Used for headless batch runs
+    """
+
+    def draw(self, world):
+        pass
+
+
+class Viewport:
+    """
+    Maps the world onto a screen of a different size
+
+    The world keeps the size it was made with, so a resize never changes the game. Only the rectangles are scaled,
+    right before they are drawn, and a screen the same size as the world is passed through untouched
+    """
+
+    def __init__(self, world_height, world_width, screen_height, screen_width):
+        self.world_height = world_height
+        self.world_width = world_width
+        self.screen_height = screen_height
+        self.screen_width = screen_width
+
+    @property
+    def identity(self):
+        return self.world_height == self.screen_height and self.world_width == self.screen_width
+
+    def rect(self, rect):
+        """
+        Scales one rectangle. The edges are scaled rather than the size, so shapes that touch in the world still touch
+        on the screen. Nothing is scaled down to less than one cell, so a small bird does not disappear
+        :param rect: (y, x, height, width) in the world
+        :return: (y, x, height, width) on the screen
+        """
+        y, x, height, width = rect
+        top = y * self.screen_height // self.world_height
+        left = x * self.screen_width // self.world_width
+        bottom = (y + height) * self.screen_height // self.world_height
+        right = (x + width) * self.screen_width // self.world_width
+        return top, left, max(bottom - top, 1), max(right - left, 1)
+
+    def shapes(self, shapes):
+        """
+        Scales every rectangle of some shapes
+        :param shapes: An iterable of (char, [(y, x, height, width), ...]), like World.shapes()
+        :return: The shapes on the screen
+        """
+        if self.identity:
+            return shapes
+        rect = self.rect
+        return [(char, [rect(each) for each in rects]) for char, rects in shapes]
+
+
+class FrameBuffer:
+    """
+    A screen sized grid of characters. A frame is drawn here first so it can be compared with the last frame
+
+    Shapes are drawn as sprites from a SpriteCache, so the rows of a shape are only built the first time a shape of
+    that size is drawn. If there is a palette, every cell also has a curses attribute
+    """
+
+    def __init__(self, height, width, blank=' ', sprites=None, palette=None):
+        """
+        :param height: The height of the frame
+        :param width: The width of the frame
+        :param blank: The character for empty cells
+        :param sprites: The SpriteCache to draw shapes from. Frames that are diffed against each other can share one
+        :param palette: A dict of char -> curses attribute for the shapes. None keeps no attributes at all
+        """
+        self.height = height
+        self.width = width
+        self.blank = blank
+        self.sprites = SpriteCache() if sprites is None else sprites
+        self.palette = palette
+        self.rows = [[blank] * width for _ in range(height)]
+        self.attrs = None if palette is None else [[0] * width for _ in range(height)]
+
+    def clear(self):
+        """
+        Blanks every cell
+        :return: None
+        """
+        blank_row = [self.blank] * self.width
+        for row in self.rows:
+            row[:] = blank_row
+        if self.attrs is not None:
+            blank_row = [0] * self.width
+            for row in self.attrs:
+                row[:] = blank_row
+
+    def invalidate(self):
+        """
+        Marks every cell as unknown so the next diff against this frame rewrites the whole screen
+        :return: None
+        """
+        unknown_row = [None] * self.width
+        for row in self.rows:
+            row[:] = unknown_row
+        if self.attrs is not None:
+            for row in self.attrs:
+                row[:] = unknown_row
+
+    def blit(self, sprite, y, x):
+        """
+        Copies a sprite into the frame. The parts of the sprite outside the frame are skipped
+        :param sprite: An instance of Sprite
+        :param y: The y coordinate of the top of the sprite
+        :param x: The x coordinate of the left of the sprite
+        :return: None
+        """
+        left = max(x, 0)
+        right = min(x + sprite.width, self.width)
+        top = max(y, 0)
+        bottom = min(y + sprite.height, self.height)
+        if left >= right or top >= bottom:
+            return
+        start = left - x
+        end = right - x
+        rows = self.rows
+        sprite_rows = sprite.rows
+        if start == 0 and end == sprite.width:
+            # Not cut off at the sides, so the rows can be copied without slicing them first
+            for y_coord in range(top, bottom):
+                rows[y_coord][left:right] = sprite_rows[y_coord - y]
+        else:
+            for y_coord in range(top, bottom):
+                rows[y_coord][left:right] = sprite_rows[y_coord - y][start:end]
+        if self.attrs is not None:
+            span = sprite.attr_row[start:end]
+            attrs = self.attrs
+            for y_coord in range(top, bottom):
+                attrs[y_coord][left:right] = span
+
+    def fill(self, char, rect):
+        """
+        Fills a rectangle with a character. The parts of the rectangle outside the frame are skipped
+        :param char: The character to fill with
+        :param rect: (y, x, height, width)
+        :return: None
+        """
+        y, x, height, width = rect
+        if height > 0 and width > 0:
+            attr = 0 if self.palette is None else self.palette.get(char, 0)
+            self.blit(self.sprites.get(height, width, char, attr), y, x)
+
+    def text(self, y, x, text):
+        """
+        Writes text into the frame. The part of the text outside the frame is skipped
+        :param y: The y coordinate
+        :param x: The x coordinate of the first character
+        :param text: The text to write
+        :return: None
+        """
+        if not 0 <= y < self.height:
+            return
+        left = max(x, 0)
+        right = min(x + len(text), self.width)
+        if left < right:
+            self.rows[y][left:right] = text[left - x:right - x]
+            if self.attrs is not None:
+                self.attrs[y][left:right] = [0] * (right - left)
+
+    def compose(self, shapes):
+        """
+        Draws a whole frame
+        :param shapes: An iterable of (char, [(y, x, height, width), ...]), like World.shapes()
+        :return: None
+        """
+        self.clear()
+        blit = self.blit
+        get = self.sprites.get
+        palette = self.palette
+        for char, rects in shapes:
+            attr = 0 if palette is None else palette.get(char, 0)
+            for y, x, height, width in rects:
+                if height > 0 and width > 0:
+                    blit(get(height, width, char, attr), y, x)
+
+    def diff(self, previous, merge=4):
+        """
+        Finds the parts of this frame that are different from another frame
+        Changed cells close to each other are merged into one run, because rewriting a few unchanged characters is
+        cheaper than moving the cursor again
+        :param previous: The FrameBuffer that is currently on the screen
+        :param merge: How many unchanged cells can sit between two changed runs before they are split
+        :return: A list of (y, x, text)
+        """
+        if self.attrs is not None:
+            return self.diff_attrs(previous, merge)
+        runs = []
+        for y, (row, old_row) in enumerate(zip(self.rows, previous.rows)):
+            # Most rows do not change at all, comparing whole rows is much faster than comparing cells
+            if row == old_row:
+                continue
+            start = end = None
+            for x, (char, old_char) in enumerate(zip(row, old_row)):
+                if char == old_char:
+                    continue
+                if start is None:
+                    start = x
+                elif x - end > merge:
+                    runs.append((y, start, ''.join(row[start:end + 1])))
+                    start = x
+                end = x
+            runs.append((y, start, ''.join(row[start:end + 1])))
+        return runs
+
+    def diff_attrs(self, previous, merge=4):
+        """
+        Like diff, for frames with attributes. A cell changed if its character or its attribute did, and a run never
+        holds two attributes, so each run can be written with the attribute of its first cell
+        :param previous: The FrameBuffer that is currently on the screen. It needs attributes too
+        :param merge: How many unchanged cells can sit between two changed runs before they are split
+        :return: A list of (y, x, text)
+        """
+        runs = []
+        for y, (row, old_row, attrs, old_attrs) in enumerate(zip(self.rows, previous.rows, self.attrs,
+                                                                 previous.attrs)):
+            if row == old_row and attrs == old_attrs:
+                continue
+            start = end = None
+            for x in range(self.width):
+                if row[x] == old_row[x] and attrs[x] == old_attrs[x]:
+                    continue
+                if start is None:
+                    start = x
+                elif x - end > merge or any(attr != attrs[start] for attr in attrs[end + 1:x + 1]):
+                    runs.append((y, start, ''.join(row[start:end + 1])))
+                    start = x
+                end = x
+            runs.append((y, start, ''.join(row[start:end + 1])))
+        return runs
+
+
+class DiffRenderer(Renderer):
+    """
+    A double buffered renderer. Every frame is drawn into a FrameBuffer and only the runs of characters that changed
+    since the last frame are written to the window, one addstr per run
+    """
+
+    def __init__(self, stdscr, height, width, merge=4, palette=None, sprites=None):
+        """
+        :param stdscr: The curses window to draw on
+        :param height: The height of the window
+        :param width: The width of the window
+        :param merge: Passed to FrameBuffer.diff
+        :param palette: A dict of char -> curses attribute, to draw shapes in colour. None draws without attributes
+        :param sprites: The SpriteCache to draw shapes from
+        """
+        self.stdscr = stdscr
+        self.merge = merge
+        self.palette = palette
+        self.sprites = SpriteCache() if sprites is None else sprites
+        self.height = height
+        self.width = width
+        # front is what is on the screen, back is the frame being drawn
+        self.front = FrameBuffer(height, width, sprites=self.sprites, palette=palette)
+        self.back = FrameBuffer(height, width, sprites=self.sprites, palette=palette)
+        # Scales the shapes when the screen is not the size of the world. None draws them as they are
+        self.viewport = None
+
+        # How much was written for the last frame
+        self.writes = 0
+        self.cells = 0
+
+    def draw(self, world):
+        self.draw_shapes(world.shapes())
+
+    def draw_shapes(self, shapes):
+        """
+        Draws a frame, writing only what changed
+        :param shapes: An iterable of (char, [(y, x, height, width), ...]), like World.shapes()
+        :return: None
+        """
+        if self.viewport is not None:
+            shapes = self.viewport.shapes(shapes)
+        self.back.compose(shapes)
+        runs = self.back.diff(self.front, merge=self.merge)
+        addstr = self.stdscr.addstr
+        attrs = self.back.attrs
+        cells = 0
+        for y, x, text in runs:
+            try:
+                if attrs is None:
+                    addstr(y, x, text)
+                else:
+                    addstr(y, x, text, attrs[y][x])
+            except Exception:
+                # Curses raises after writing to the bottom right corner of the window because the cursor cannot
+                # move past it. The character is still drawn
+                pass
+            cells += len(text)
+        self.writes = len(runs)
+        self.cells = cells
+        self.front, self.back = self.back, self.front
+
+    def invalidate(self):
+        """
+        Forgets what is on the screen so the next frame is drawn in full
+        :return: None
+        """
+        self.front.invalidate()
+
+    def resize(self, height, width, viewport=None):
+        """
+        Changes the size of the screen. The frames are made again at the new size and the next frame is drawn in
+        full. The sprite cache is kept: sprites of sizes that are no longer drawn are the least recently used, so they
+        are the ones thrown away
+        :param height: The new height of the screen
+        :param width: The new width of the screen
+        :param viewport: An instance of Viewport for the new size, or None
+        :return: None
+        """
+        self.height = height
+        self.width = width
+        self.viewport = viewport
+        self.front = FrameBuffer(height, width, sprites=self.sprites, palette=self.palette)
+        self.back = FrameBuffer(height, width, sprites=self.sprites, palette=self.palette)
+        self.front.invalidate()
+
+    def overlay(self, y, x, text):
+        """
+        Writes text on top of the frame, like a HUD. The cells under it are drawn again on the next frame
+        :param y: The y coordinate
+        :param x: The x coordinate of the first character
+        :param text: The text to write
+        :return: None
+        """
+        if not 0 <= y < self.front.height:
+            return
+        text = text[:max(self.front.width - x, 0)]
+        try:
+            self.stdscr.addstr(y, x, text)
+        except Exception:
+            pass
+        self.front.rows[y][x:x + len(text)] = [None] * len(text)
+
+    def refresh(self):
+        self.stdscr.refresh()
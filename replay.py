@@ -0,0 +1,234 @@
+#
+# Recording and replaying games
+# A game is decided by its seed, its layout and which ticks the bird flapped on, so that is all that is stored.
+# Replaying re-simulates the game headless as fast as possible and checks the final score
+#
+# Run with: python replay.py recording.fbr
+#
+
+import collections
+import json
+import struct
+import sys
+import time
+
+from logic import World
+from physics import Physics
+
+MAGIC = b'FBR1'
+# seed, height, width, ticks, score, encoding, length of the layout
+HEADER = struct.Struct('<QHHIIBH')
+
+BITS = 0
+RUNS = 1
+
+Recording = collections.namedtuple('Recording', ['seed', 'height', 'width', 'layout', 'flaps', 'score'])
+
+
+def write_varint(output, number):
+    """
+    Appends a number using 7 bits per byte. Small numbers take one byte
+    :param output: A bytearray
+    :param number: A number that is at least 0
+    :return: None
+    """
+    while number >= 0x80:
+        output.append((number & 0x7f) | 0x80)
+        number >>= 7
+    output.append(number)
+
+
+def read_varint(data, index):
+    """
+    Reads a number written by write_varint
+    :param data: The bytes
+    :param index: Where the number starts
+    :return: (the number, where the next number starts)
+    """
+    number = shift = 0
+    while True:
+        byte = data[index]
+        index += 1
+        number |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return number, index
+        shift += 7
+
+
+def pack_bits(flaps):
+    """
+    Packs one flap per bit
+    :param flaps: A list of booleans
+    :return: bytes
+    """
+    packed = bytearray((len(flaps) + 7) // 8)
+    for tick, flap in enumerate(flaps):
+        if flap:
+            packed[tick >> 3] |= 1 << (tick & 7)
+    return bytes(packed)
+
+
+def unpack_bits(data, ticks):
+    return [bool(data[tick >> 3] & (1 << (tick & 7))) for tick in range(ticks)]
+
+
+def pack_runs(flaps):
+    """
+    Packs the lengths of the runs of ticks without and with flaps, starting with a run without flaps
+    :param flaps: A list of booleans
+    :return: bytes
+    """
+    packed = bytearray()
+    current = False
+    length = 0
+    for flap in flaps:
+        if flap == current:
+            length += 1
+        else:
+            write_varint(packed, length)
+            current = flap
+            length = 1
+    write_varint(packed, length)
+    return bytes(packed)
+
+
+def unpack_runs(data, ticks):
+    flaps = []
+    current = False
+    index = 0
+    while len(flaps) < ticks:
+        length, index = read_varint(data, index)
+        flaps.extend([current] * length)
+        current = not current
+    return flaps
+
+
+class Recorder:
+    """
+    Records which ticks the bird flapped on
+    """
+
+    def __init__(self, world):
+        """
+        :param world: The World being recorded. It needs a seed and start must already have been called
+        """
+        assert world.seed is not None, "Only worlds with a seed can be recorded"
+        # Checked now rather than when the recording is saved, after the whole game has been played
+        assert 0 <= world.seed < 2 ** 64, "The seed is stored in 8 bytes, so it must be from 0 to 2**64 - 1"
+        self.world = world
+        self.flaps = []
+
+    def record(self, flap):
+        """
+        Records one tick
+        :param flap: Whether the bird flapped this tick
+        :return: None
+        """
+        self.flaps.append(bool(flap))
+
+    def recording(self):
+        """
+        :return: An instance of Recording with everything recorded so far
+        """
+        world = self.world
+        layout = dict(world.layout)
+        if world.physics is not None:
+            # Stored with the layout so the replay moves the bird the same way
+            layout['physics'] = world.physics.settings()
+        return Recording(world.seed, world.height, world.width, layout, list(self.flaps), world.ScoreEngine.score())
+
+    def save(self, path):
+        """
+        Writes the recording to a file
+        :param path: Where to write the file
+        :return: How many bytes were written
+        """
+        data = dumps(self.recording())
+        with open(path, 'wb') as file:
+            file.write(data)
+        return len(data)
+
+
+def dumps(recording):
+    """
+    Turns a recording into bytes. The flaps are stored one per bit or as run lengths, whichever is smaller
+    :param recording: An instance of Recording
+    :return: bytes
+    """
+    bits = pack_bits(recording.flaps)
+    runs = pack_runs(recording.flaps)
+    encoding, flaps = (RUNS, runs) if len(runs) < len(bits) else (BITS, bits)
+    layout = json.dumps(recording.layout, separators=(',', ':'), sort_keys=True).encode()
+    header = HEADER.pack(recording.seed, recording.height, recording.width, len(recording.flaps), recording.score,
+                         encoding, len(layout))
+    return MAGIC + header + layout + flaps
+
+
+def loads(data):
+    """
+    Turns bytes made by dumps back into a recording
+    :param data: bytes
+    :return: An instance of Recording
+    """
+    assert data[:len(MAGIC)] == MAGIC, "Not a recording"
+    index = len(MAGIC)
+    seed, height, width, ticks, score, encoding, layout_length = HEADER.unpack_from(data, index)
+    index += HEADER.size
+    layout = json.loads(data[index:index + layout_length].decode())
+    index += layout_length
+    unpack = unpack_runs if encoding == RUNS else unpack_bits
+    return Recording(seed, height, width, layout, unpack(data[index:], ticks), score)
+
+
+def load(path):
+    with open(path, 'rb') as file:
+        return loads(file.read())
+
+
+def replay(recording):
+    """
+    Plays a recording again without a screen
+    :param recording: An instance of Recording
+    :return: The World after the last recorded tick
+    """
+    layout = dict(recording.layout)
+    physics = layout.pop('physics', None)
+    world = World(recording.height, recording.width, seed=recording.seed,
+                  physics=None if physics is None else Physics(**physics)).start(**layout)
+    step = world.step
+    for flap in recording.flaps:
+        if step(flap) is not None:
+            break
+    return world
+
+
+def verify(recording):
+    """
+    Checks that replaying a recording gives the score that was recorded
+    :param recording: An instance of Recording
+    :return: True or False
+    """
+    return replay(recording).ScoreEngine.score() == recording.score
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print('Usage: python replay.py recording.fbr [...]')
+        return 2
+    failed = 0
+    for path in argv:
+        recording = load(path)
+        start = time.perf_counter()
+        world = replay(recording)
+        seconds = time.perf_counter() - start
+        ok = world.ScoreEngine.score() == recording.score
+        failed += not ok
+        print('{}: {} ticks, recorded score {}, replayed score {}, {} in {:.3f}s'.format(
+            path, len(recording.flaps), recording.score, world.ScoreEngine.score(), 'OK' if ok else 'MISMATCH',
+            seconds))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
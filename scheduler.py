@@ -0,0 +1,131 @@
+#
+# A fixed timestep game loop
+# The world always moves forward in steps of the same length, no matter how long drawing takes
+#
+
+import time
+
+
+def drain(poll):
+    """
+    Reads every key that is waiting
+    :param poll: Called to read one key. Returns -1 when there are no keys left, like stdscr.getch
+    :return: A list of keys
+    """
+    keys = []
+    key = poll()
+    while key != -1:
+        keys.append(key)
+        key = poll()
+    return keys
+
+
+class Scheduler:
+    """
+    Runs a game at a fixed timestep
+
+    Real time is added up every frame and the world is stepped once for every whole tick that has passed. Input is
+    drained once per frame and handed to the next step, so no key press is lost and the speed of the game does not
+    drift when the machine is busy. Drawing happens once per frame at a target FPS, or as fast as possible if there is
+    no target
+    """
+
+    def __init__(self, step, render, poll, tick_length, fps=None, max_steps=5, clock=time.perf_counter,
+                 sleep=time.sleep):
+        """
+        :param step: Called with a list of keys once per tick. Returning False stops the loop
+        :param render: Called once per frame to draw
+        :param poll: Called to read one key. Should return -1 when there are no keys left, like stdscr.getch
+        :param tick_length: How many seconds one step of the world takes
+        :param fps: How many frames to draw every second. None draws as fast as possible
+        :param max_steps: The most steps run in one frame. Stops a slow machine from falling further and further behind
+        :param clock: Returns the current time in seconds
+        :param sleep: Sleeps for some seconds
+        """
+        assert tick_length > 0, "The length of a tick must be greater than 0"
+        assert fps is None or fps > 0, "The FPS must be greater than 0, or None for no cap"
+        self.step = step
+        self.render = render
+        self.poll = poll
+        self.tick_length = tick_length
+        self.frame_length = None if fps is None else 1 / fps
+        self.max_steps = max_steps
+        self.clock = clock
+        self.sleep = sleep
+
+        # Keys that were read but have not been given to a step yet
+        self.pending = []
+        self.running = False
+
+        # Measurements, in seconds
+        self.tick_time = 0
+        self.render_time = 0
+        self.frame_time = 0
+        self.ticks = 0
+        self.frames = 0
+
+    def drain(self):
+        """
+        Reads every key that is waiting
+        :return: A list of keys
+        """
+        return drain(self.poll)
+
+    def stop(self):
+        """
+        Stops the loop after the current frame
+        :return: None
+        """
+        self.running = False
+
+    def frame(self, elapsed):
+        """
+        Runs one frame: reads input, steps the world for every tick that has passed and draws
+        :param elapsed: How many seconds of real time have not been simulated yet
+        :return: How many seconds of real time are still left over
+        """
+        clock = self.clock
+        self.pending.extend(self.drain())
+
+        steps = 0
+        while elapsed >= self.tick_length and self.running:
+            if steps == self.max_steps:
+                # Too far behind to catch up. Drop the time instead of running more and more steps every frame
+                elapsed = 0
+                break
+            start = clock()
+            keys, self.pending = self.pending, []
+            if self.step(keys) is False:
+                self.running = False
+            self.tick_time = clock() - start
+            self.ticks += 1
+            elapsed -= self.tick_length
+            steps += 1
+
+        if self.running:
+            start = clock()
+            self.render()
+            self.render_time = clock() - start
+            self.frames += 1
+        return elapsed
+
+    def run(self):
+        """
+        Runs frames until a step returns False or stop is called
+        :return: None
+        """
+        clock = self.clock
+        self.running = True
+        previous = clock()
+        elapsed = 0
+        while self.running:
+            start = clock()
+            elapsed = self.frame(elapsed + start - previous)
+            previous = start
+
+            if self.frame_length is not None:
+                # Sleep until it is time for the next frame
+                remaining = self.frame_length - (clock() - start)
+                if remaining > 0:
+                    self.sleep(remaining)
+            self.frame_time = clock() - start
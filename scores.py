@@ -0,0 +1,165 @@
+#
+# A high score store backed by SQLite
+# Scores are indexed by player, by seed and by config so a top N query reads only the top N rows of an index.
+# Writes are buffered and committed in batches, and the database runs in WAL mode so several processes can add scores
+# to the same file at once
+#
+
+import sqlite3
+import time
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    seed INTEGER,
+    config TEXT NOT NULL DEFAULT '',
+    score INTEGER NOT NULL,
+    ticks INTEGER NOT NULL DEFAULT 0,
+    cause TEXT,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC);
+CREATE INDEX IF NOT EXISTS scores_by_player ON scores (player, score DESC);
+CREATE INDEX IF NOT EXISTS scores_by_seed ON scores (seed, score DESC);
+CREATE INDEX IF NOT EXISTS scores_by_config ON scores (config, score DESC);
+'''
+
+COLUMNS = ('player', 'seed', 'config', 'score', 'ticks', 'cause', 'created')
+
+
+def config_key(world):
+    """
+    Describes the settings of a world, so only scores from the same settings are compared. Scores played with
+    physics are kept apart from scores played with the integer movement, and from scores with other physics
+    :param world: An instance of World
+    :return: A string, like '50x120' or '50x120 physics dt=0.2 flap_speed=30 gravity=150 max_fall=25'
+    """
+    key = '{}x{}'.format(world.height, world.width)
+    if world.physics is not None:
+        settings = world.physics.settings()
+        key += ' physics ' + ' '.join('{}={:g}'.format(name, settings[name]) for name in sorted(settings))
+    return key
+
+
+class ScoreStore:
+    """
+    Keeps every score ever played and answers leaderboard queries
+    """
+
+    def __init__(self, path='highscores.db', batch_size=1000, timeout=30):
+        """
+        :param path: The database file
+        :param batch_size: How many scores to buffer before they are written. 1 writes every score straight away
+        :param timeout: How many seconds to wait for another process to finish writing
+        """
+        assert batch_size > 0, "The batch size needs to be at least 1"
+        self.path = path
+        self.batch_size = batch_size
+        self.pending = []
+
+        # isolation_level=None so transactions are only started by flush
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        # With WAL, NORMAL only syncs at checkpoints instead of on every commit
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def add(self, player, score, seed=None, config='', ticks=0, cause=None):
+        """
+        Adds a score. It is written once the buffer is full, or on flush or close
+        :param player: Who played. For headless runs, the name of the policy
+        :param score: The score
+        :param seed: The seed of the pipes
+        :param config: The settings of the world, see config_key
+        :param ticks: How many ticks the bird survived
+        :param cause: What the bird hit, or None
+        :return: None
+        """
+        self.pending.append((player, seed, config, score, ticks, cause, time.time()))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def add_results(self, results, config=''):
+        """
+        Adds the results of a sweep from parallel.evaluate
+        :param results: An iterable of parallel.Result
+        :param config: The settings of the worlds
+        :return: None
+        """
+        for result in results:
+            self.add(result.policy, result.score, seed=result.seed, config=config, ticks=result.ticks,
+                     cause=result.cause)
+
+    def flush(self):
+        """
+        Writes every buffered score in one transaction
+        :return: How many scores were written
+        """
+        if not self.pending:
+            return 0
+        pending = self.pending
+        connection = self.connection
+        # IMMEDIATE takes the write lock up front, so two processes flushing at once wait for each other instead of
+        # failing half way through. If the lock is not free before the timeout, nothing is lost: the scores stay
+        # buffered until the next flush
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany('INSERT INTO scores ({}) VALUES (?, ?, ?, ?, ?, ?, ?)'.format(', '.join(COLUMNS)),
+                                   pending)
+            connection.execute('COMMIT')
+        except Exception:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        # Only thrown away once they are safely written
+        self.pending = []
+        return len(pending)
+
+    def top(self, n=10, player=None, seed=None, config=None):
+        """
+        The best scores, best first. Scores that have not been flushed yet are not included
+        :param n: How many scores
+        :param player: Only scores by this player
+        :param seed: Only scores on this seed
+        :param config: Only scores with these settings
+        :return: A list of dicts with the keys in COLUMNS
+        """
+        conditions = []
+        values = []
+        for column, value in (('player', player), ('seed', seed), ('config', config)):
+            if value is not None:
+                conditions.append('{} = ?'.format(column))
+                values.append(value)
+        where = 'WHERE ' + ' AND '.join(conditions) if conditions else ''
+        rows = self.connection.execute('SELECT {} FROM scores {} ORDER BY score DESC LIMIT ?'.format(
+            ', '.join(COLUMNS), where), values + [n])
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def best(self, player=None, seed=None, config=None):
+        """
+        The best score
+        :return: The score, or None if there are no scores
+        """
+        top = self.top(1, player=player, seed=seed, config=config)
+        return top[0]['score'] if top else None
+
+    def count(self):
+        """
+        :return: How many scores have been written
+        """
+        return self.connection.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+
+    def close(self):
+        """
+        Writes the buffered scores and closes the database
+        :return: None
+        """
+        self.flush()
+        self.connection.close()
@@ -0,0 +1,272 @@
+#
+# Hosts many games at once
+# Every client gets its own headless World. One asyncio loop steps every world once per tick and sends each client only
+# the parts of its screen that changed. See protocol.py for the messages
+#
+# Run with: python server.py [--port 7777] [--unix /tmp/flappy.sock]
+#
+
+import argparse
+import asyncio
+import random
+import time
+
+from logic import World
+from profiling import Profiler
+from render import FrameBuffer
+import protocol
+
+# Shown in the middle of the screen when the bird hits something
+GAME_OVER = ' You hit the {}! Press R to play again or Esc to quit '
+
+# The sizes a client can ask for. Smaller screens do not fit the first pipe and the bird, bigger ones are clamped
+MIN_SIZE = (20, 40)
+MAX_SIZE = (200, 400)
+
+
+class Session:
+    """
+    One client and its game
+    """
+
+    def __init__(self, writer, height, width, seed, merge=4):
+        """
+        :param writer: The asyncio.StreamWriter of the client
+        :param height: The height of the world
+        :param width: The width of the world
+        :param seed: The seed for the pipes
+        :param merge: Passed to FrameBuffer.diff
+        """
+        self.writer = writer
+        self.height = height
+        self.width = width
+        self.seed = seed
+        self.merge = merge
+        self.world = None
+
+        # What the client has on its screen, and the frame being drawn
+        self.front = FrameBuffer(height, width)
+        self.back = FrameBuffer(height, width)
+
+        # Input from the client that has not been acted on yet
+        self.flap = False
+        self.restart = False
+        # How many inputs have been read, and how many of them a step has acted on
+        self.received = 0
+        self.inputs = 0
+        # Whether the world changed since the last frame was sent
+        self.dirty = False
+        # Frames not sent because the client was not reading fast enough
+        self.skipped = 0
+        self.new_game()
+
+    def new_game(self):
+        """
+        Starts a new world with the next seed
+        :return: None
+        """
+        self.world = World(self.height, self.width, seed=self.seed).start()
+        self.seed += 1
+        # Nothing sent during the last game carries over into this one
+        self.flap = False
+        self.restart = False
+        self.dirty = True
+
+    def receive(self, data):
+        """
+        Acts on bytes sent by the client. A flap only counts while the bird is alive and a restart only counts once
+        the game is over, so neither is kept for later
+        :param data: bytes
+        :return: False if the client quit, else True
+        """
+        for byte in data:
+            self.received += 1
+            if byte == protocol.FLAP:
+                self.flap = self.world.collision is None
+            elif byte == protocol.RESTART:
+                self.restart = self.world.collision is not None
+            elif byte == protocol.QUIT:
+                return False
+        return True
+
+    def step(self):
+        """
+        Moves the world forward one tick. A world that ended waits for the client to ask for a new one
+        :return: None
+        """
+        if self.world.collision is not None:
+            if not self.restart:
+                self.flap = False
+                return
+            self.new_game()
+        self.world.step(self.flap)
+        self.flap = False
+        self.restart = False
+        self.inputs = self.received
+        self.dirty = True
+
+    def frame(self):
+        """
+        Draws the world and packs what changed since the last frame that was sent
+        :return: bytes
+        """
+        world = self.world
+        score = world.ScoreEngine.score()
+        back = self.back
+        back.compose(world.shapes())
+        back.text(0, 0, 'Score: {}'.format(score))
+        collision = world.collision
+        if collision is not None:
+            # Drawn into the frame so the next game's frames know to rub it out
+            back.text(self.height // 2, 2, GAME_OVER.format(collision.kind))
+        runs = back.diff(self.front, merge=self.merge)
+        self.front, self.back = back, self.front
+        self.dirty = False
+
+        return protocol.encode_frame(protocol.PLAYING if collision is None else protocol.OVER,
+                                     None if collision is None else collision.kind, world.ticks, score, self.inputs,
+                                     runs)
+
+
+class Server:
+    """
+    Steps every session at a fixed timestep and sends the frames
+    """
+
+    def __init__(self, tick_length=0.1, seed=None, max_buffer=1 << 16, report=10):
+        """
+        :param tick_length: How many seconds one tick takes
+        :param seed: The seed of the first game. Every game after it gets the next seed. Random if None
+        :param max_buffer: How many bytes can be waiting to be sent to a client before its frames are skipped. A
+        skipped frame is not lost, the next frame sent has everything that changed since the last one that was sent
+        :param report: How many seconds between printing stats. None never prints
+        """
+        assert tick_length > 0, "The length of a tick must be greater than 0"
+        self.tick_length = tick_length
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.max_buffer = max_buffer
+        self.report = report
+        self.sessions = set()
+        self.profiler = Profiler()
+        self.ticks = 0
+        self.bytes_sent = 0
+
+    async def handle(self, reader, writer):
+        """
+        Talks to one client until it quits or disconnects
+        :param reader: An asyncio.StreamReader
+        :param writer: An asyncio.StreamWriter
+        :return: None
+        """
+        try:
+            height, width = protocol.HELLO.unpack(await reader.readexactly(protocol.HELLO.size))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+        height = min(max(height, MIN_SIZE[0]), MAX_SIZE[0])
+        width = min(max(width, MIN_SIZE[1]), MAX_SIZE[1])
+        session = Session(writer, height, width, self.seed)
+        self.seed = (self.seed + 7919) % 2 ** 32
+        self.sessions.add(session)
+        try:
+            while True:
+                data = await reader.read(256)
+                if not data or not session.receive(data):
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions.discard(session)
+            writer.close()
+
+    def tick(self):
+        """
+        Steps every session once and sends the frames
+        :return: None
+        """
+        for session in self.sessions:
+            session.step()
+            if not session.dirty:
+                continue
+            transport = session.writer.transport
+            if transport.is_closing():
+                continue
+            if transport.get_write_buffer_size() > self.max_buffer:
+                session.skipped += 1
+                continue
+            data = session.frame()
+            session.writer.write(data)
+            self.bytes_sent += len(data)
+        self.ticks += 1
+
+    async def run(self):
+        """
+        Ticks forever
+        :return: None
+        """
+        clock = time.perf_counter
+        next_tick = clock()
+        next_report = None if self.report is None else clock() + self.report
+        while True:
+            start = clock()
+            self.tick()
+            self.profiler.record('tick', clock() - start)
+
+            if next_report is not None and start >= next_report:
+                self.print_stats()
+                next_report = start + self.report
+
+            next_tick += self.tick_length
+            delay = next_tick - clock()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Too far behind to catch up
+                next_tick = clock()
+                await asyncio.sleep(0)
+
+    def print_stats(self):
+        tick = self.profiler.stats().get('tick')
+        if tick is None:
+            return
+        print('{} sessions, {} ticks, tick p50 {:.3f}ms p99 {:.3f}ms max {:.3f}ms, {} bytes sent, {} frames '
+              'skipped'.format(len(self.sessions), self.ticks, tick['p50'] * 1000, tick['p99'] * 1000,
+                               tick['max'] * 1000, self.bytes_sent,
+                               sum(session.skipped for session in self.sessions)), flush=True)
+        self.profiler.reset()
+
+    async def serve(self, host='127.0.0.1', port=7777, unix=None):
+        """
+        Listens for clients and ticks until cancelled
+        :param host: The address to listen on
+        :param port: The TCP port to listen on
+        :param unix: A Unix socket path to listen on instead of TCP
+        :return: None
+        """
+        if unix is not None:
+            server = await asyncio.start_unix_server(self.handle, path=unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await self.run()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Hosts many games of Glappy Gird at once')
+    parser.add_argument('--host', default='127.0.0.1', help='The address to listen on')
+    parser.add_argument('--port', type=int, default=7777, help='The TCP port to listen on')
+    parser.add_argument('--unix', help='Listen on this Unix socket instead of TCP')
+    parser.add_argument('--tick', type=float, default=0.1, help='How many seconds one tick takes')
+    parser.add_argument('--seed', type=int, help='The seed of the first game')
+    parser.add_argument('--report', type=float, default=10, help='How many seconds between printing stats')
+    args = parser.parse_args(argv)
+
+    server = Server(tick_length=args.tick, seed=args.seed, report=args.report)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
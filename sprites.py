@@ -0,0 +1,90 @@
+#
+# Sprites are shapes rasterized once and kept, so drawing a shape is copying its rows instead of building them again
+# every frame. The cache is keyed by size, character and attribute and throws away the least recently used sprite
+# when it is full
+#
+
+import collections
+
+
+class Sprite:
+    """
+    A rectangle of characters with one curses attribute
+
+    The rows are kept as lists of characters because that is what FrameBuffer stores, so drawing a row is a single
+    slice assignment
+    """
+
+    __slots__ = ('height', 'width', 'char', 'attr', 'rows', 'attr_row')
+
+    def __init__(self, height, width, char, attr=0):
+        """
+        :param height: The height of the sprite
+        :param width: The width of the sprite
+        :param char: The character to fill the sprite with. A longer string is repeated across every row, so '<>'
+        draws <><><>
+        :param attr: A curses attribute, like curses.color_pair(1) | curses.A_BOLD. 0 for none
+        """
+        self.height = height
+        self.width = width
+        self.char = char
+        self.attr = attr
+        row = list((char * (width // len(char) + 1))[:width])
+        # Every row is the same, so they are one list. Nothing writes to them
+        self.rows = [row] * height
+        self.attr_row = [attr] * width
+
+    def text(self):
+        """
+        The sprite as text, one line per row
+        :return: A string
+        """
+        return '\n'.join(''.join(row) for row in self.rows)
+
+
+class SpriteCache:
+    """
+    Rasterizes every (height, width, char, attr) once and keeps the most recently used ones
+    """
+
+    def __init__(self, capacity=256):
+        """
+        :param capacity: The most sprites to keep
+        """
+        assert capacity > 0, "The cache needs to hold at least one sprite"
+        self.capacity = capacity
+        self.sprites = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def get(self, height, width, char, attr=0):
+        """
+        Finds a sprite, rasterizing it if it is not cached
+        :param height: The height of the sprite
+        :param width: The width of the sprite
+        :param char: The character to fill it with
+        :param attr: A curses attribute, 0 for none
+        :return: An instance of Sprite
+        """
+        key = (height, width, char, attr)
+        sprites = self.sprites
+        sprite = sprites.get(key)
+        if sprite is not None:
+            sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+        self.misses += 1
+        sprite = sprites[key] = Sprite(height, width, char, attr)
+        if len(sprites) > self.capacity:
+            sprites.popitem(last=False)
+        return sprite
+
+    def clear(self):
+        """
+        Throws away every sprite
+        :return: None
+        """
+        self.sprites.clear()